@@ -0,0 +1,217 @@
+import os, threading
+import numpy as np
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+APP_ROOT = os.path.abspath(os.path.dirname(__file__))
+MODEL_DIR = os.path.join(APP_ROOT, "dog_model")
+# savedmodel: dog_model/ as trained; tflite: a variant published by quantize.py;
+# onnx: python -m tf2onnx.convert --saved-model dog_model --output dog_model_onnx/model.onnx
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "savedmodel")
+SAVEDMODEL_PATH = os.environ.get("SAVEDMODEL_PATH", MODEL_DIR)
+TFLITE_MODEL_PATH = os.environ.get("TFLITE_MODEL_PATH", os.path.join(APP_ROOT, "dog_model_tflite", "model_int8.tflite"))
+ONNX_MODEL_PATH = os.environ.get("ONNX_MODEL_PATH", os.path.join(APP_ROOT, "dog_model_onnx", "model.onnx"))
+# How the SavedModel signature is called: "eager" passes each batch straight to
+# the signature; "function" wraps it in a tf.function with a fixed
+# [None, 224, 224, 3] float32 input signature; "xla" additionally compiles it
+# with XLA (jit_compile=True), one executable per batch size seen.
+SAVEDMODEL_EXECUTION = os.environ.get("SAVEDMODEL_EXECUTION", "function")
+# Number of (class index, score) pairs the serving path returns per image.
+TOP_K = int(os.environ.get("TOP_K", 3))
+INFERENCE_THREADS = int(os.environ.get("INFERENCE_THREADS", os.environ.get("TFLITE_THREADS", os.cpu_count() or 1)))
+
+
+# One (class index, score) pair; top-k results are (N, k) arrays of these, so
+# they stack, split per row and cross the inference socket as plain npy.
+TOP_K_DTYPE = np.dtype([("index", np.int32), ("score", np.float32)])
+
+
+def pack_top_k(indices, scores):
+    out = np.empty(indices.shape, dtype=TOP_K_DTYPE)
+    out["index"] = indices
+    out["score"] = scores
+    return out
+
+
+# -----------------------------
+# BACKENDS
+# -----------------------------
+class InferenceBackend:
+    """A loaded model: float32 (N, 224, 224, 3) batch in, (N, classes) probabilities out.
+
+    Instances are callable, so they can be handed to `MicroBatcher` or the
+    inference server wherever a `run_batch` function is expected. `top_k`
+    returns only the best `k` classes per image, best first.
+    """
+
+    name = None
+
+    def __init__(self, path):
+        self.path = path
+
+    @staticmethod
+    def import_runtime():
+        """Import (and return) the framework module; split out so startup can time it."""
+        raise NotImplementedError
+
+    def predict(self, batch):
+        raise NotImplementedError
+
+    def top_k(self, batch, k=TOP_K):
+        probs = self.predict(batch)
+        # argpartition + sorting k columns instead of a full argsort per row.
+        indices = np.argpartition(probs, -k, axis=1)[:, -k:]
+        scores = np.take_along_axis(probs, indices, axis=1)
+        order = np.argsort(-scores, axis=1)
+        return pack_top_k(np.take_along_axis(indices, order, axis=1), np.take_along_axis(scores, order, axis=1))
+
+    def __call__(self, batch):
+        return self.predict(batch)
+
+
+class SavedModelBackend(InferenceBackend):
+    name = "savedmodel"
+
+    @staticmethod
+    def import_runtime():
+        import tensorflow as tf
+        return tf
+
+    def __init__(self, path=SAVEDMODEL_PATH, execution=SAVEDMODEL_EXECUTION):
+        super().__init__(path)
+        if execution not in ("eager", "function", "xla"):
+            raise ValueError(f"unknown SAVEDMODEL_EXECUTION {execution!r}")
+        tf = self._tf = self.import_runtime()
+
+        print("🔄 Loading TensorFlow SavedModel...")
+        self.model = tf.saved_model.load(path)
+        self.infer = self.model.signatures["serving_default"]
+        # A model exported by export_topk.py serves {"indices", "scores"} by
+        # default and keeps the full distribution under "probabilities".
+        self.exported_k = None
+        if "indices" in self.infer.structured_outputs:
+            self.topk_infer = self.infer
+            self.exported_k = int(self.topk_infer.structured_outputs["indices"].shape[-1])
+            self.infer = self.model.signatures["probabilities"]
+        # The classifier has a single output; name it explicitly instead of
+        # relying on dict ordering.
+        self.output_key = sorted(self.infer.structured_outputs)[0]
+        self.execution = execution
+        self._spec = tf.TensorSpec([None, 224, 224, 3], tf.float32)
+        self._topk_fns = {}
+        if execution != "eager":
+            self._fn = tf.function(self._forward, input_signature=[self._spec], jit_compile=execution == "xla")
+        print(f"✅ SavedModel loaded successfully ({execution})")
+
+    def _forward(self, x):
+        return self.infer(x)[self.output_key]
+
+    def _forward_top_k(self, x, k):
+        if self.exported_k is not None:
+            out = self.topk_infer(x)
+            return out["indices"][:, :k], out["scores"][:, :k]
+        top = self._tf.math.top_k(self._forward(x), k=k)
+        return top.indices, top.values
+
+    def predict(self, batch):
+        if self.execution == "eager":
+            return self.infer(self._tf.constant(batch))[self.output_key].numpy()
+        return self._fn(batch).numpy()
+
+    def _topk_function(self, k):
+        # XLA needs k (TopKV2 and the slice bounds) as a compile-time
+        # constant, so each k gets its own function with k baked in.
+        fn = self._topk_fns.get(k)
+        if fn is None:
+            fn = self._topk_fns[k] = self._tf.function(lambda x: self._forward_top_k(x, k),
+                                                       input_signature=[self._spec],
+                                                       jit_compile=self.execution == "xla")
+        return fn
+
+    def top_k(self, batch, k=TOP_K):
+        """Top-k selected inside the graph: only (N, k) leaves TensorFlow."""
+        k = int(k)
+        if self.exported_k is not None and k > self.exported_k:
+            raise ValueError(f"model was exported with k={self.exported_k}, asked for {k}")
+        if self.execution == "eager":
+            indices, scores = self._forward_top_k(self._tf.constant(batch), k)
+        else:
+            indices, scores = self._topk_function(k)(batch)
+        return pack_top_k(indices.numpy(), scores.numpy())
+
+
+class TFLiteBackend(InferenceBackend):
+    name = "tflite"
+
+    @staticmethod
+    def import_runtime():
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        return Interpreter
+
+    def __init__(self, path=TFLITE_MODEL_PATH, num_threads=INFERENCE_THREADS):
+        super().__init__(path)
+        Interpreter = self.import_runtime()
+
+        print(f"🔄 Loading TFLite model {os.path.basename(path)}...")
+        self.interpreter = Interpreter(model_path=path, num_threads=num_threads)
+        self._input_index = self.interpreter.get_input_details()[0]["index"]
+        self._output_index = self.interpreter.get_output_details()[0]["index"]
+        self.interpreter.allocate_tensors()
+        self._lock = threading.Lock()
+        print("✅ TFLite model loaded successfully")
+
+    def predict(self, batch):
+        # The interpreter is stateful: one invocation at a time, and the input
+        # tensor is only re-allocated when the batch size changes.
+        with self._lock:
+            if tuple(self.interpreter.get_input_details()[0]["shape"]) != batch.shape:
+                self.interpreter.resize_tensor_input(self._input_index, batch.shape)
+                self.interpreter.allocate_tensors()
+            self.interpreter.set_tensor(self._input_index, batch)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self._output_index).copy()
+
+
+class OnnxBackend(InferenceBackend):
+    name = "onnx"
+
+    @staticmethod
+    def import_runtime():
+        import onnxruntime as ort
+        return ort
+
+    def __init__(self, path=ONNX_MODEL_PATH, num_threads=INFERENCE_THREADS):
+        super().__init__(path)
+        ort = self.import_runtime()
+
+        print(f"🔄 Loading ONNX model {os.path.basename(path)}...")
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input_name = self.session.get_inputs()[0].name
+        self._output_name = self.session.get_outputs()[0].name
+        print("✅ ONNX model loaded successfully")
+
+    def predict(self, batch):
+        return self.session.run([self._output_name], {self._input_name: np.ascontiguousarray(batch, dtype=np.float32)})[0]
+
+
+BACKENDS = {cls.name: cls for cls in (SavedModelBackend, TFLiteBackend, OnnxBackend)}
+DEFAULT_PATHS = {"savedmodel": SAVEDMODEL_PATH, "tflite": TFLITE_MODEL_PATH, "onnx": ONNX_MODEL_PATH}
+
+
+def backend_model_path(name=INFERENCE_BACKEND):
+    """Artifact `name` serves by default, e.g. for cache fingerprints."""
+    if name not in DEFAULT_PATHS:
+        raise ValueError(f"unknown INFERENCE_BACKEND {name!r}, expected one of {sorted(BACKENDS)}")
+    return DEFAULT_PATHS[name]
+
+
+def create_backend(name=INFERENCE_BACKEND, path=None):
+    return BACKENDS[name](path or backend_model_path(name))
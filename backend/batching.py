@@ -0,0 +1,101 @@
+import os, queue, threading, time
+from collections import Counter
+import numpy as np
+
+
+class _Pending:
+    __slots__ = ("x", "done", "result", "error")
+
+    def __init__(self, x):
+        self.x = x
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Coalesces single-image inference calls from concurrent requests.
+
+    Callers block in `submit()` while a background thread collects queued
+    inputs until either `max_batch_size` items are waiting or `max_wait_ms`
+    has passed since the first one arrived, runs `run_batch` once on the
+    stacked batch and hands each caller its own row of the output.
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_wait_ms=5.0):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._batch_sizes = Counter()
+        self._queue_depths = Counter()
+        self._batches = 0
+        self._items = 0
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so a batcher created in a preloading
+        # gunicorn master is (re)started lazily inside each worker.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            threading.Thread(target=self._loop, name="micro-batcher", daemon=True).start()
+            self._pid = os.getpid()
+
+    def submit(self, x):
+        """Queue one preprocessed input (without batch axis) and wait for its output row."""
+        self._ensure_started()
+        pending = _Pending(x)
+        with self._lock:
+            self._queue_depths[self._queue.qsize()] += 1
+        self._queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _loop(self):
+        q = self._queue
+        while True:
+            batch = [q.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(q.get(timeout=remaining) if remaining > 0 else q.get_nowait())
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            out = self.run_batch(np.stack([p.x for p in batch]))
+            for i, p in enumerate(batch):
+                p.result = out[i]
+        except Exception as e:
+            for p in batch:
+                p.error = e
+        finally:
+            with self._lock:
+                self._batch_sizes[len(batch)] += 1
+                self._batches += 1
+                self._items += len(batch)
+            for p in batch:
+                p.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+                "batches": self._batches,
+                "items": self._items,
+                "mean_batch_size": (self._items / self._batches) if self._batches else 0.0,
+                "batch_size_histogram": {str(k): v for k, v in sorted(self._batch_sizes.items())},
+                "queue_depth_histogram": {str(k): v for k, v in sorted(self._queue_depths.items())},
+            }
@@ -0,0 +1,137 @@
+# bench_backends.py
+# Run the same images through every available inference backend and compare
+# latency percentiles, throughput per batch size, memory and output agreement.
+#   python bench_backends.py [--backends savedmodel tflite onnx] [--batch-sizes 1 8 32] [--json out.json]
+# Each backend runs in its own subprocess so RSS numbers are not polluted by
+# the others.
+import argparse, glob, json, os, resource, subprocess, sys, tempfile, time
+import numpy as np
+from backends import BACKENDS, backend_model_path, create_backend
+from preprocess import preprocess_image
+
+APP_ROOT = os.path.abspath(os.path.dirname(__file__))
+DEFAULT_IMAGE_DIRS = [os.path.join(APP_ROOT, "static", "uploads"), os.path.join(APP_ROOT, "dataset_split", "val")]
+EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def collect_images(dirs):
+    files = []
+    for d in dirs:
+        files += sorted(f for f in glob.glob(os.path.join(d, "**", "*"), recursive=True)
+                        if f.lower().endswith(EXTENSIONS))
+    return files
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024.0
+    return 0.0
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+# -----------------------------
+# WORKER (one backend per process)
+# -----------------------------
+def run_worker(name, images, batch_sizes, iterations, out_dir):
+    x = np.concatenate([preprocess_image(path) for path in images])
+    rss_before = rss_mb()
+    t0 = time.perf_counter()
+    backend = create_backend(name)
+    load_seconds = time.perf_counter() - t0
+
+    np.save(os.path.join(out_dir, f"{name}.npy"), backend(x))
+
+    result = {"backend": name, "path": backend.path, "load_seconds": load_seconds,
+              "rss_model_mb": rss_mb() - rss_before, "batches": {}}
+    for batch_size in batch_sizes:
+        batch = np.ascontiguousarray(np.resize(x, (batch_size,) + x.shape[1:]))
+        backend(batch)  # warm-up / shape specialisation
+        samples = []
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            backend(batch)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        result["batches"][str(batch_size)] = {
+            "p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+            "images_per_sec": batch_size * iterations / (sum(samples) / 1000.0),
+        }
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+# -----------------------------
+# DRIVER
+# -----------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inference backends.")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--images", nargs="+", default=DEFAULT_IMAGE_DIRS, help="image directories")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--out-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    images = collect_images(args.images)
+    if not images:
+        raise SystemExit(f"No images found in {args.images}")
+
+    if args.worker:
+        result = run_worker(args.worker, images, args.batch_sizes, args.iterations, args.out_dir)
+        print("RESULT " + json.dumps(result))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for name in args.backends:
+            if not os.path.exists(backend_model_path(name)):
+                print(f"⏭️  {name}: no artifact at {backend_model_path(name)}")
+                continue
+            print(f"🔹 {name}...")
+            cmd = [sys.executable, os.path.abspath(__file__), "--worker", name, "--out-dir", out_dir,
+                   "--iterations", str(args.iterations), "--batch-sizes", *map(str, args.batch_sizes),
+                   "--images", *args.images]
+            proc = subprocess.run(cmd, capture_output=True, text=True)
+            lines = [l for l in proc.stdout.splitlines() if l.startswith("RESULT ")]
+            if proc.returncode != 0 or not lines:
+                print(f"❌ {name} failed:\n{proc.stderr[-2000:]}")
+                continue
+            results.append(json.loads(lines[-1][len("RESULT "):]))
+
+        # Agreement against the first backend that ran (savedmodel by default).
+        if results:
+            reference = np.load(os.path.join(out_dir, f"{results[0]['backend']}.npy"))
+            for result in results:
+                probs = np.load(os.path.join(out_dir, f"{result['backend']}.npy"))
+                result["agreement"] = {
+                    "reference": results[0]["backend"],
+                    "top1_match": float((probs.argmax(1) == reference.argmax(1)).mean()),
+                    "max_abs_diff": float(np.abs(probs - reference).max()),
+                }
+
+    print(f"\n{len(images)} images\n")
+    print(f"{'backend':<11} {'load s':>7} {'model MB':>9} {'peak MB':>8} {'top1 agree':>10} {'max diff':>9}")
+    for r in results:
+        a = r["agreement"]
+        print(f"{r['backend']:<11} {r['load_seconds']:>7.2f} {r['rss_model_mb']:>9.1f} {r['peak_rss_mb']:>8.1f} "
+              f"{a['top1_match']:>10.3f} {a['max_abs_diff']:>9.5f}")
+    print(f"\n{'backend':<11} {'batch':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'img/s':>9}")
+    for r in results:
+        for batch_size, b in r["batches"].items():
+            print(f"{r['backend']:<11} {batch_size:>5} {b['p50_ms']:>8.2f} {b['p95_ms']:>8.2f} {b['p99_ms']:>8.2f} "
+                  f"{b['images_per_sec']:>9.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"images": len(images), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# bench_compression.py
+# Compare a pruned/clustered export (train.py --prune-sparsity/--cluster-count,
+# see compression.py) with the dense model the way serve.py loads and runs
+# them: size on disk and zipped, load and warm-up time, latency, sparsity and
+# optionally top-1/top-3 on dataset_split/val.
+#   python bench_compression.py [--dense dog_model] [--compressed dog_model_compressed]
+import argparse, io, json, os, zipfile
+import numpy as np
+import tensorflow as tf
+from backends import MODEL_DIR, TOP_K, SavedModelBackend
+from bench_graph import latency_ms
+from evaluate import VAL_DIR, accuracy, list_val_set
+from startup import IMG_SHAPE, ModelLoader
+
+# Where train.py exports a pruned/clustered run
+COMPRESSED_MODEL_DIR = os.path.join(os.path.dirname(MODEL_DIR), "dog_model_compressed")
+
+
+# -----------------------------
+# SIZE
+# -----------------------------
+def zipped_bytes(model_dir):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for root, _, files in os.walk(model_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                archive.write(path, os.path.relpath(path, model_dir))
+    return buffer.getbuffer().nbytes
+
+
+def kernel_stats(variables, max_clustered_values=256):
+    """Sparsity over all conv/dense kernels, and how many of the kernels well
+    above `max_clustered_values` weights hold at most that many distinct
+    values (i.e. look clustered)."""
+    kernels = [v.numpy() for v in variables if len(v.shape) >= 2 and v.dtype == tf.float32]
+    total = sum(k.size for k in kernels)
+    return {"kernels": len(kernels),
+            "sparsity": sum(int((k == 0).sum()) for k in kernels) / total if total else 0.0,
+            "clustered_kernels": sum(1 for k in kernels
+                                     if k.size > 4 * max_clustered_values and np.unique(k).size <= max_clustered_values)}
+
+
+# -----------------------------
+# COMPARISON
+# -----------------------------
+def measure(model_path, iterations, val_set=None):
+    """Size, serve.py-style load time (top-k path loaded and warmed by
+    ModelLoader) and latency of one exported model."""
+    loader = ModelLoader(SavedModelBackend, model_path, top_k=TOP_K)
+    loader.load()
+    report = {"path": model_path,
+              "dir_bytes": sum(os.path.getsize(os.path.join(root, name))
+                               for root, _, files in os.walk(model_path) for name in files),
+              "zip_bytes": zipped_bytes(model_path),
+              "load_seconds": loader.phases["load_model"],
+              "warmup_seconds": loader.phases["warmup"],
+              **kernel_stats(loader.backend.model.variables)}
+    for batch_size in (1, 8):
+        samples = latency_ms(loader.run_batch, np.zeros((batch_size,) + IMG_SHAPE, dtype=np.float32), iterations)
+        report[f"latency_ms_b{batch_size}"] = float(np.median(samples))
+    if val_set is not None:
+        metrics = accuracy(loader.backend, *val_set)
+        report.update(top1=metrics["top1"], top3=metrics["top3"])
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a pruned/clustered export with the dense model.")
+    parser.add_argument("--dense", default=MODEL_DIR)
+    parser.add_argument("--compressed", default=COMPRESSED_MODEL_DIR)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--val-dir", default=VAL_DIR, help="also score top-1/top-3 here ('' to skip)")
+    parser.add_argument("--json", help="write the comparison here")
+    args = parser.parse_args()
+
+    val_set = list_val_set(args.val_dir) if args.val_dir and os.path.isdir(args.val_dir) else None
+    # Import TensorFlow up front so neither model's load time includes it.
+    SavedModelBackend.import_runtime()
+    results = {name: measure(path, args.iterations, val_set)
+               for name, path in (("dense", args.dense), ("compressed", args.compressed))}
+
+    rows = [("dir MB", "dir_bytes", 1e-6, ".1f"), ("zip MB", "zip_bytes", 1e-6, ".1f"),
+            ("load s", "load_seconds", 1, ".2f"), ("warmup s", "warmup_seconds", 1, ".2f"),
+            ("b1 ms", "latency_ms_b1", 1, ".1f"), ("b8 ms", "latency_ms_b8", 1, ".1f"),
+            ("sparsity", "sparsity", 1, ".3f"), ("clustered", "clustered_kernels", 1, "d")]
+    if val_set is not None:
+        rows += [("top-1", "top1", 1, ".4f"), ("top-3", "top3", 1, ".4f")]
+    print(f"\n{'':<10} {'dense':>10} {'compressed':>11} {'ratio':>7}")
+    for label, key, scale, fmt in rows:
+        dense, compressed = results["dense"][key], results["compressed"][key]
+        ratio = f"{compressed / dense:.2f}x" if dense else "-"
+        print(f"{label:<10} {format(dense * scale, fmt):>10} {format(compressed * scale, fmt):>11} {ratio:>7}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# bench_graph.py
+# Compare the ways SavedModelBackend can call dog_model: the eager serving
+# signature, a fixed-signature tf.function, and the same compiled with XLA.
+#   python bench_graph.py [--modes eager function xla] [--batch-sizes 1 8 32] [--json out.json]
+# Checks output parity (probabilities and the top-k path serving runs)
+# against the eager path first (exit 1 on mismatch), then
+# reports end-to-end latency per batch size and the fixed per-call cost
+# (dispatch overhead), estimated as the intercept of median latency vs batch
+# size.
+import argparse, json, time
+import numpy as np
+from backends import MODEL_DIR, TOP_K, SavedModelBackend
+from bench_backends import DEFAULT_IMAGE_DIRS, collect_images
+from preprocess import preprocess_image
+
+MODES = ["eager", "function", "xla"]
+
+
+def latency_ms(backend, batch, iterations):
+    backend(batch)  # trace / compile for this shape
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        backend(batch)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark eager vs tf.function vs XLA inference.")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--images", nargs="+", default=DEFAULT_IMAGE_DIRS, help="image directories")
+    parser.add_argument("--atol", type=float, default=1e-4, help="max allowed |probability| difference vs eager")
+    parser.add_argument("--k", type=int, default=TOP_K, help="k for the top_k parity check")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    images = collect_images(args.images)
+    if not images:
+        raise SystemExit(f"No images found in {args.images}")
+    x = np.concatenate([preprocess_image(path) for path in images])
+
+    eager = SavedModelBackend(args.model_dir, execution="eager")
+    reference = eager(x)
+    reference_top = eager.top_k(x, k=args.k)
+    results, mismatched = [], []
+    for mode in args.modes:
+        print(f"🔹 {mode}...")
+        backend = SavedModelBackend(args.model_dir, execution=mode)
+        t0 = time.perf_counter()
+        probs = backend(x)
+        first_call = time.perf_counter() - t0
+        top = backend.top_k(x, k=args.k)
+        result = {
+            "mode": mode,
+            "first_call_seconds": first_call,
+            "parity": {
+                "top1_match": float((probs.argmax(1) == reference.argmax(1)).mean()),
+                "max_abs_diff": float(np.abs(probs - reference).max()),
+                # Serving runs top_k. Indices are checked through the reference
+                # probabilities they pick, so ties between classes do not count.
+                "top_k_max_abs_diff": float(max(
+                    np.abs(top["score"] - reference_top["score"]).max(),
+                    np.abs(np.take_along_axis(reference, top["index"], axis=1) - reference_top["score"]).max())),
+            },
+            "batches": {},
+        }
+        if max(result["parity"]["max_abs_diff"], result["parity"]["top_k_max_abs_diff"]) > args.atol:
+            mismatched.append(mode)
+        for batch_size in args.batch_sizes:
+            batch = np.ascontiguousarray(np.resize(x, (batch_size,) + x.shape[1:]))
+            samples = latency_ms(backend, batch, args.iterations)
+            p50, p95 = np.percentile(samples, [50, 95])
+            result["batches"][str(batch_size)] = {
+                "p50_ms": p50, "p95_ms": p95,
+                "images_per_sec": batch_size * args.iterations / (sum(samples) / 1000.0),
+            }
+        if len(args.batch_sizes) > 1:
+            medians = [result["batches"][str(b)]["p50_ms"] for b in args.batch_sizes]
+            per_image, fixed = np.polyfit(args.batch_sizes, medians, 1)
+            result["dispatch_ms"], result["per_image_ms"] = float(fixed), float(per_image)
+        results.append(result)
+
+    print(f"\n{len(images)} images\n")
+    print(f"{'mode':<9} {'first s':>8} {'dispatch ms':>11} {'ms/image':>9} {'top1 agree':>10} {'max diff':>9} {'top-k diff':>10}")
+    for r in results:
+        p = r["parity"]
+        print(f"{r['mode']:<9} {r['first_call_seconds']:>8.2f} {r.get('dispatch_ms', float('nan')):>11.3f} "
+              f"{r.get('per_image_ms', float('nan')):>9.3f} {p['top1_match']:>10.3f} {p['max_abs_diff']:>9.2e} "
+              f"{p['top_k_max_abs_diff']:>10.2e}")
+    print(f"\n{'mode':<9} {'batch':>5} {'p50 ms':>8} {'p95 ms':>8} {'img/s':>9}")
+    for r in results:
+        for batch_size, b in r["batches"].items():
+            print(f"{r['mode']:<9} {batch_size:>5} {b['p50_ms']:>8.2f} {b['p95_ms']:>8.2f} {b['images_per_sec']:>9.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"images": len(images), "results": results}, f, indent=2)
+    if mismatched:
+        raise SystemExit(f"❌ Output mismatch beyond atol={args.atol}: {', '.join(mismatched)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# bench_input.py
+# Training input throughput: the old ImageDataGenerator.flow_from_directory
+# pipeline vs train_data.make_dataset, on the same directory and batch size.
+#   python bench_input.py [--dir dataset_split/train] [--batches 50] [--epochs 2]
+# tf.data's first epoch decodes; later epochs read the decoded-image cache.
+import argparse, time
+import tensorflow as tf
+from train_data import make_dataset
+
+TRAIN_DIR = "dataset_split/train"
+
+
+def generator_dataset(directory, batch_size):
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+    return ImageDataGenerator(
+        preprocessing_function=tf.keras.applications.efficientnet.preprocess_input,
+        rotation_range=20,
+        width_shift_range=0.1,
+        height_shift_range=0.1,
+        shear_range=0.1,
+        zoom_range=0.1,
+        horizontal_flip=True,
+        fill_mode="nearest"
+    ).flow_from_directory(directory, target_size=(224, 224), batch_size=batch_size, class_mode="categorical")
+
+
+def images_per_sec(batches, limit):
+    images = 0
+    t0 = time.perf_counter()
+    for i, (x, _) in enumerate(batches):
+        images += int(x.shape[0])
+        if i + 1 >= limit:
+            break
+    return images / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare training input pipelines.")
+    parser.add_argument("--dir", default=TRAIN_DIR)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--batches", type=int, default=0, help="batches per epoch (default: whole dataset)")
+    parser.add_argument("--epochs", type=int, default=2)
+    parser.add_argument("--cache", default="memory", help='"memory", a file prefix, or "none"')
+    args = parser.parse_args()
+
+    gen = generator_dataset(args.dir, args.batch_size)
+    limit = args.batches or len(gen)
+    results = {"ImageDataGenerator": [images_per_sec(gen, limit) for _ in range(args.epochs)]}
+
+    dataset, _, _ = make_dataset(args.dir, args.batch_size, training=True,
+                                 cache=None if args.cache == "none" else args.cache)
+    results["tf.data"] = [images_per_sec(dataset, limit) for _ in range(args.epochs)]
+
+    print(f"\n{limit} batches of {args.batch_size} per epoch\n")
+    print(f"{'pipeline':<20}" + "".join(f"{f'epoch {e + 1} img/s':>16}" for e in range(args.epochs)))
+    for name, rates in results.items():
+        print(f"{name:<20}" + "".join(f"{r:>16.1f}" for r in rates))
+    base = results["ImageDataGenerator"][-1]
+    print(f"\ntf.data speedup (last epoch): {results['tf.data'][-1] / base:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# bench_preprocess.py
+# Compare the original preprocess_image() against preprocess.py on sample uploads.
+#   python bench_preprocess.py [--repeat 20] [images or directories...]
+import argparse, glob, io, os, statistics, time
+import numpy as np
+from PIL import Image
+from preprocess import IMG_SIZE, preprocess_image
+
+APP_ROOT = os.path.abspath(os.path.dirname(__file__))
+DEFAULT_DIR = os.path.join(APP_ROOT, "static", "uploads")
+EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def legacy_preprocess_image(file_stream):
+    img = Image.open(file_stream).convert("RGB").resize((IMG_SIZE, IMG_SIZE))
+    arr = np.array(img) / 255.0
+    arr = np.expand_dims(arr, 0).astype(np.float32)
+    return arr
+
+
+def collect(paths):
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            files += sorted(f for f in glob.glob(os.path.join(p, "**", "*"), recursive=True)
+                            if f.lower().endswith(EXTENSIONS))
+        else:
+            files.append(p)
+    return files
+
+
+def time_ms(fn, data, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(io.BytesIO(data))
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark image preprocessing.")
+    parser.add_argument("paths", nargs="*", default=[DEFAULT_DIR])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    files = collect(args.paths)
+    if not files:
+        raise SystemExit(f"No images found in {args.paths}")
+
+    pooled = lambda f: preprocess_image(f, pooled=True)
+    print(f"{'image':<48} {'size':>11} {'legacy ms':>10} {'new ms':>8} {'speedup':>8} {'max |diff|':>10}")
+    totals = [0.0, 0.0]
+    for path in files:
+        with open(path, "rb") as f:
+            data = f.read()
+        with Image.open(io.BytesIO(data)) as im:
+            dims = f"{im.width}x{im.height}"
+        legacy = time_ms(legacy_preprocess_image, data, args.repeat)
+        new = time_ms(pooled, data, args.repeat)
+        diff = float(np.abs(legacy_preprocess_image(io.BytesIO(data)) - pooled(io.BytesIO(data))).max())
+        totals[0] += legacy
+        totals[1] += new
+        print(f"{os.path.basename(path)[:48]:<48} {dims:>11} {legacy:>10.2f} {new:>8.2f} {legacy / new:>7.2f}x {diff:>10.4f}")
+    print(f"{'TOTAL (median per image, summed)':<60} {totals[0]:>10.2f} {totals[1]:>8.2f} {totals[0] / totals[1]:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# bench_reports.py
+# Reports/sec of reports.render_report() against the original per-call
+# import + style rebuild + markup parse, rendering into memory.
+#   python bench_reports.py [--count 50] [--image static/uploads/dawg.webp]
+import argparse, io, os, time
+from reportlab import rl_config
+from reports import REPORT_IMAGE_MAX_HEIGHT, prepare_report_image, render_report
+
+APP_ROOT = os.path.abspath(os.path.dirname(__file__))
+DEFAULT_IMAGE = os.path.join(APP_ROOT, "static", "uploads", "dawg.webp")
+TIMESTAMP = "2024-01-01 00:00:00"
+
+
+def legacy_render_report(output, breed_display, confidence, description, image_bytes=None, timestamp=None):
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image as RLImage
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.pagesizes import legal
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+
+    doc = SimpleDocTemplate(output, pagesize=legal, leftMargin=40, rightMargin=40, topMargin=40, bottomMargin=40)
+    FRAME_WIDTH = doc.width
+    story = []
+    header_table = Table([[breed_display], [""]], colWidths=[FRAME_WIDTH], rowHeights=[30, 15])
+    header_table.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (-1,-1), colors.black),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0,0), (-1,0), 22)
+    ]))
+    story.append(header_table)
+    info_data = [
+        [" Predicted Breed", f" {breed_display}"],
+        [" Confidence", f" {confidence:.4f}"],
+        [" Generated", f" {timestamp}"],
+    ]
+    info_table = Table(info_data, colWidths=[FRAME_WIDTH * 0.35, FRAME_WIDTH * 0.65])
+    info_table.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (0,-1), colors.HexColor("#f5f7fa")),
+        ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
+        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+        ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
+        ('FONTSIZE', (0,0), (-1,-1), 12)
+    ]))
+    story.append(info_table)
+    story.append(Spacer(1, 0.3 * inch))
+    if image_bytes:
+        stream, width, height = prepare_report_image(image_bytes, FRAME_WIDTH * 0.8, REPORT_IMAGE_MAX_HEIGHT)
+        story.append(RLImage(stream, width=width, height=height))
+        story.append(Spacer(1, 0.3 * inch))
+    desc_style = ParagraphStyle(name="Description", fontSize=11, leading=16, alignment=4, spaceBefore=10)
+    story.append(Paragraph(description, desc_style))
+    doc.build(story)
+
+
+def reports_per_second(render, count, description, image_bytes):
+    t0 = time.perf_counter()
+    for _ in range(count):
+        render(io.BytesIO(), "Whippet", 0.9876, description, image_bytes=image_bytes, timestamp=TIMESTAMP)
+    return count / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF report rendering.")
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    args = parser.parse_args()
+
+    os.environ.setdefault("INFERENCE_MODE", "remote")  # serve.py only needs the breed tables
+    from serve import breed_info_by_name
+    description = breed_info_by_name["whippet"]["long_description"]
+    with open(args.image, "rb") as f:
+        image_bytes = f.read()
+
+    # Identical output is only comparable byte for byte with invariant PDFs.
+    rl_config.invariant = 1
+    outputs = []
+    for render in (legacy_render_report, render_report):
+        buf = io.BytesIO()
+        render(buf, "Whippet", 0.9876, description, image_bytes=image_bytes, timestamp=TIMESTAMP)
+        outputs.append(buf.getvalue())
+    print(f"identical output: {outputs[0] == outputs[1]}")
+
+    for label, img in (("text only", None), ("with image", image_bytes)):
+        reports_per_second(render_report, 3, description, img)  # warm caches
+        before = reports_per_second(legacy_render_report, args.count, description, img)
+        after = reports_per_second(render_report, args.count, description, img)
+        print(f"{label:<11} before {before:7.1f} reports/s   after {after:7.1f} reports/s   ({after / before:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# compression.py
+# Optional train-time compression for train.py's fine-tune phase (magnitude
+# pruning, weight clustering). Compressed runs export to dog_model_compressed/
+# next to the dense dog_model/; bench_compression.py compares the two.
+#   python train.py --prune-sparsity 0.5 [--cluster-count 16]
+# Needs tensorflow-model-optimization (pip install tensorflow-model-optimization)
+# at training time only: exports have the wrappers stripped, so serve.py
+# loads them like any other SavedModel.
+import os, shutil
+import tensorflow as tf
+
+# Layer types pruning and clustering know how to wrap; the rest (batch norm,
+# activations, squeeze-excite multiplies...) carry no large kernels.
+COMPRESSIBLE = (tf.keras.layers.Conv2D, tf.keras.layers.DepthwiseConv2D, tf.keras.layers.Dense)
+
+
+def import_tfmot():
+    try:
+        import tensorflow_model_optimization as tfmot
+    except ImportError as e:
+        raise ImportError("Pruning and clustering need tensorflow-model-optimization: "
+                          "pip install tensorflow-model-optimization") from e
+    return tfmot
+
+
+# -----------------------------
+# TRAIN-TIME WRAPPERS
+# -----------------------------
+def target_layers(model, base_model, num_layers=20):
+    """Names of the compressible layers among the last `num_layers` of the
+    backbone (the ones train.py unfreezes) and in the classifier head."""
+    backbone = {layer.name for layer in base_model.layers}
+    unfrozen = {layer.name for layer in base_model.layers[-num_layers:]}
+    return {layer.name for layer in model.layers
+            if isinstance(layer, COMPRESSIBLE) and (layer.name in unfrozen or layer.name not in backbone)}
+
+
+def wrap_layers(model, names, wrap):
+    """Clone `model` with `wrap(layer)` in place of each layer in `names`.
+    Every other layer is reused as-is, and wrappers wrap the original layer,
+    so no weights are lost."""
+    return tf.keras.models.clone_model(model, clone_function=lambda layer: wrap(layer) if layer.name in names else layer)
+
+
+def apply_pruning(model, names, final_sparsity, end_step, begin_step=0):
+    """Magnitude pruning ramping from 0 to `final_sparsity` between the two
+    steps (polynomial schedule); needs `pruning_callbacks()` in `fit`."""
+    tfmot = import_tfmot()
+    schedule = tfmot.sparsity.keras.PolynomialDecay(initial_sparsity=0.0, final_sparsity=final_sparsity,
+                                                    begin_step=begin_step, end_step=end_step)
+    return wrap_layers(model, names, lambda layer: tfmot.sparsity.keras.prune_low_magnitude(layer, pruning_schedule=schedule))
+
+
+def pruning_callbacks():
+    return [import_tfmot().sparsity.keras.UpdatePruningStep()]
+
+
+def strip_pruning(model):
+    return import_tfmot().sparsity.keras.strip_pruning(model)
+
+
+def apply_clustering(model, names, number_of_clusters, preserve_sparsity=False):
+    """Share `number_of_clusters` k-means++ centroids per kernel. With
+    `preserve_sparsity` (after pruning), zeroed weights stay zero."""
+    tfmot = import_tfmot()
+    params = {"number_of_clusters": number_of_clusters,
+              "cluster_centroids_init": tfmot.clustering.keras.CentroidInitialization.KMEANS_PLUS_PLUS}
+    if preserve_sparsity:
+        from tensorflow_model_optimization.python.core.clustering.keras.experimental import cluster
+        return wrap_layers(model, names, lambda layer: cluster.cluster_weights(layer, preserve_sparsity=True, **params))
+    return wrap_layers(model, names, lambda layer: tfmot.clustering.keras.cluster_weights(layer, **params))
+
+
+def strip_clustering(model):
+    return import_tfmot().clustering.keras.strip_clustering(model)
+
+
+# -----------------------------
+# EXPORT
+# -----------------------------
+def write_archive(model_dir):
+    """Zip `model_dir` (deflate) next to it and return the archive path.
+
+    A SavedModel stores pruned and clustered kernels as plain float32, so
+    the directory is no smaller than the dense one; zeros and repeated
+    centroid values are what the archive compresses away.
+    """
+    return shutil.make_archive(model_dir.rstrip(os.sep), "zip", model_dir)
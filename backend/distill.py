@@ -0,0 +1,246 @@
+# distill.py
+# Train a compact student to mimic dog_model (the teacher) and export it in
+# dog_model's layout, so serve.py loads it unchanged:
+#   python distill.py [--student mobilenet_v3_small] [--img-size 160] [--temperature 4 --alpha 0.3]
+#                     [--out-dir dog_model_student]
+#   SAVEDMODEL_PATH=dog_model_student gunicorn serve:app -c gunicorn.conf.py
+# The teacher's outputs over dataset_split/ are computed once and cached in
+# --cache, so trying another student or other hyperparameters only trains
+# the student. Ends with an accuracy-vs-latency table for teacher and student,
+# both run exactly as serve.py runs them.
+import argparse, json, os
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
+from backends import MODEL_DIR, SavedModelBackend
+from bench_graph import latency_ms
+from evaluate import accuracy, list_val_set
+from feature_cache import read_meta
+from pack_dataset import load_class_names
+from train_data import AUTOTUNE, IMG_SIZE, decode_resize, list_image_dir
+from train_runtime import ThroughputLogger
+
+APP_ROOT = os.path.abspath(os.path.dirname(__file__))
+TRAIN_DIR = os.path.join(APP_ROOT, "dataset_split", "train")
+VAL_DIR = os.path.join(APP_ROOT, "dataset_split", "val")
+CACHE_DIR = os.path.join(APP_ROOT, "teacher_cache")
+OUT_DIR = os.path.join(APP_ROOT, "dog_model_student")
+
+# name -> (constructor, scale, offset): serve.py's [0, 1] pixels * scale +
+# offset is the range the backbone's ImageNet weights expect.
+STUDENTS = {
+    "mobilenet_v3_small": (tf.keras.applications.MobileNetV3Small, 255.0, 0.0),
+    "mobilenet_v3_large": (tf.keras.applications.MobileNetV3Large, 255.0, 0.0),
+    "mobilenet_v2": (tf.keras.applications.MobileNetV2, 2.0, -1.0),
+    "efficientnet_b0": (tf.keras.applications.EfficientNetB0, 255.0, 0.0),
+}
+
+
+# -----------------------------
+# TEACHER CACHE
+# -----------------------------
+def teacher_log_probs(teacher, paths, batch_size, scale=255.0):
+    """Teacher log-probabilities for `paths`, in order.
+
+    The teacher exports softmax probabilities; their log differs from its
+    logits by a per-image constant, which a softmax at any temperature
+    ignores. Pixels are fed as [0, 1] * `scale`; 255 is what train.py
+    trained on.
+    """
+    dataset = (tf.data.Dataset.from_tensor_slices(paths)
+               .map(lambda path: decode_resize(path, 0)[0], num_parallel_calls=AUTOTUNE)
+               .batch(batch_size)
+               .prefetch(AUTOTUNE))
+    out = []
+    for images in dataset:
+        probs = teacher(images.numpy().astype(np.float32) * np.float32(scale / 255.0))
+        out.append(np.log(np.maximum(probs, 1e-8)).astype(np.float32))
+    return np.concatenate(out)
+
+
+def ensure_teacher_cache(cache_dir, teacher_path, splits, class_names, batch_size, scale):
+    """{split: (paths, labels, teacher log-probs)}, recomputing the teacher
+    outputs only when the teacher, class list or images changed."""
+    data = {split: list_image_dir(directory, class_names)[:2] for split, directory in splits.items()}
+    pb = os.path.join(teacher_path, "saved_model.pb")
+    meta = {"teacher": os.path.abspath(teacher_path), "teacher_mtime": os.path.getmtime(pb) if os.path.exists(pb) else None,
+            "scale": scale, "class_names": class_names, "img_size": IMG_SIZE,
+            "splits": {split: {"dir": os.path.abspath(splits[split]), "count": len(paths)}
+                       for split, (paths, _) in data.items()}}
+    meta_path = os.path.join(cache_dir, "meta.json")
+    if read_meta(cache_dir) == meta:
+        print(f"   reusing cached teacher outputs in {cache_dir}")
+    else:
+        os.makedirs(cache_dir, exist_ok=True)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        teacher = SavedModelBackend(teacher_path)
+        for split, (paths, _) in data.items():
+            print(f"   running the teacher over {len(paths)} {split} images...")
+            np.save(os.path.join(cache_dir, f"{split}-teacher.npy"), teacher_log_probs(teacher, paths, batch_size, scale))
+        with open(meta_path, "w") as f:
+            json.dump(meta, f, indent=2)
+    return {split: (paths, np.array(labels, dtype=np.int32), np.load(os.path.join(cache_dir, f"{split}-teacher.npy")))
+            for split, (paths, labels) in data.items()}
+
+
+# -----------------------------
+# STUDENT
+# -----------------------------
+def student_dataset(paths, labels, teacher, num_classes, batch_size, training):
+    """(images in [0, 1], [one-hot label | teacher log-probs]) batches.
+
+    Only horizontal flips are applied: the teacher outputs were cached for
+    the unaugmented images, and a flip does not change what breed they show.
+    """
+    dataset = tf.data.Dataset.from_tensor_slices((paths, labels, teacher))
+    dataset = dataset.map(lambda path, label, t: (decode_resize(path, label)[0], label, t),
+                          num_parallel_calls=AUTOTUNE).cache()
+    if training:
+        dataset = dataset.shuffle(2048, reshuffle_each_iteration=True)
+
+    def to_inputs(images, labels, t):
+        images = tf.cast(images, tf.float32) / 255.0
+        if training:
+            images = tf.image.random_flip_left_right(images)
+        return images, tf.concat([tf.one_hot(labels, num_classes), t], axis=1)
+
+    return dataset.batch(batch_size, num_parallel_calls=AUTOTUNE).map(to_inputs, num_parallel_calls=AUTOTUNE).prefetch(AUTOTUNE)
+
+
+def build_student(name, num_classes, img_size, weights="imagenet", dropout=0.2):
+    """Student with serve.py's input, (224, 224, 3) in [0, 1], returning logits.
+
+    Downscaling to `img_size` happens inside the model, so the smaller input
+    cuts latency without changing what serve.py feeds it.
+    Returns (model, backbone).
+    """
+    constructor, scale, offset = STUDENTS[name]
+    inputs = tf.keras.Input((IMG_SIZE, IMG_SIZE, 3))
+    x = inputs
+    if img_size != IMG_SIZE:
+        x = tf.keras.layers.Resizing(img_size, img_size, interpolation="area", name="student_resize")(x)
+    x = tf.keras.layers.Rescaling(scale, offset, name="student_scale")(x)
+    backbone = constructor(include_top=False, weights=weights, input_shape=(img_size, img_size, 3), pooling="avg")
+    x = backbone(x)
+    x = tf.keras.layers.Dropout(dropout)(x)
+    logits = tf.keras.layers.Dense(num_classes, dtype="float32", name="logits")(x)
+    return tf.keras.Model(inputs, logits, name=f"student_{name}"), backbone
+
+
+def distillation_loss(num_classes, temperature=4.0, alpha=0.3):
+    """alpha * cross-entropy on the true labels + (1 - alpha) * T² * KL between
+    the temperature-softened teacher and student distributions (Hinton et al.).
+    `y_true` packs [one-hot label | teacher log-probs]."""
+    def loss(y_true, logits):
+        onehot, teacher = y_true[:, :num_classes], y_true[:, num_classes:]
+        hard = tf.keras.losses.categorical_crossentropy(onehot, logits, from_logits=True)
+        teacher_t = tf.nn.log_softmax(teacher / temperature)
+        soft = tf.reduce_sum(tf.exp(teacher_t) * (teacher_t - tf.nn.log_softmax(logits / temperature)), axis=-1)
+        return alpha * hard + (1.0 - alpha) * temperature ** 2 * soft
+
+    return loss
+
+
+def label_accuracy(num_classes):
+    def accuracy(y_true, logits):
+        return tf.keras.metrics.categorical_accuracy(y_true[:, :num_classes], logits)
+
+    return accuracy
+
+
+def export(student, out_dir, class_names):
+    """Save with a softmax on top, as dog_model/ plus class_names.json."""
+    probs = tf.keras.layers.Softmax(dtype="float32", name="probabilities")(student.output)
+    tf.keras.Model(student.input, probs).save(out_dir)
+    with open(os.path.join(out_dir, "class_names.json"), "w") as f:
+        json.dump({name: i for i, name in enumerate(class_names)}, f)
+
+
+# -----------------------------
+# REPORT
+# -----------------------------
+def directory_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+def profile(model_path, paths, labels, batch_size, iterations):
+    """Served-path accuracy on the validation set plus single-image latency."""
+    backend = SavedModelBackend(model_path)
+    metrics = accuracy(backend, paths, labels, batch_size)
+    samples = latency_ms(backend, np.zeros((1, IMG_SIZE, IMG_SIZE, 3), dtype=np.float32), iterations)
+    p50, p95 = np.percentile(samples, [50, 95])
+    return dict(metrics, latency_ms_p50=float(p50), latency_ms_p95=float(p95), size_bytes=directory_bytes(model_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distil dog_model into a compact student.")
+    parser.add_argument("--teacher", default=MODEL_DIR)
+    parser.add_argument("--teacher-scale", type=float, default=255.0,
+                        help="teacher input is [0, 1] pixels times this (255: train.py's range)")
+    parser.add_argument("--student", default="mobilenet_v3_small", choices=sorted(STUDENTS))
+    parser.add_argument("--img-size", type=int, default=160, help="student input size (resized inside the model)")
+    parser.add_argument("--weights", default="imagenet", help="student backbone init: imagenet or none")
+    parser.add_argument("--temperature", type=float, default=4.0)
+    parser.add_argument("--alpha", type=float, default=0.3, help="weight of the hard-label loss")
+    parser.add_argument("--head-epochs", type=int, default=3, help="epochs with the student backbone frozen")
+    parser.add_argument("--epochs", type=int, default=15)
+    parser.add_argument("--lr", type=float, default=1e-4, help="learning rate once the backbone is unfrozen")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--train-dir", default=TRAIN_DIR)
+    parser.add_argument("--val-dir", default=VAL_DIR)
+    parser.add_argument("--cache", default=CACHE_DIR)
+    parser.add_argument("--out-dir", default=OUT_DIR)
+    parser.add_argument("--latency-iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    class_names = load_class_names(os.path.join(args.teacher, "class_names.json"))
+    num_classes = len(class_names)
+
+    print("\n🔹 Teacher outputs...")
+    data = ensure_teacher_cache(args.cache, args.teacher, {"train": args.train_dir, "val": args.val_dir},
+                                class_names, args.batch_size, args.teacher_scale)
+    train_ds = student_dataset(*data["train"], num_classes, args.batch_size, training=True)
+    val_ds = student_dataset(*data["val"], num_classes, args.batch_size, training=False)
+
+    student, backbone = build_student(args.student, num_classes, args.img_size,
+                                      None if args.weights == "none" else args.weights)
+    loss = distillation_loss(num_classes, args.temperature, args.alpha)
+    callbacks = [
+        EarlyStopping(monitor="val_loss", patience=4, restore_best_weights=True),
+        ReduceLROnPlateau(monitor="val_loss", factor=0.3, patience=2, verbose=1),
+        ThroughputLogger(args.batch_size),
+    ]
+
+    print(f"\n🔹 Training {args.student} head ({args.img_size}x{args.img_size})...")
+    backbone.trainable = False
+    student.compile(optimizer=tf.keras.optimizers.Adam(1e-3), loss=loss, metrics=[label_accuracy(num_classes)])
+    student.fit(train_ds, validation_data=val_ds, epochs=args.head_epochs, callbacks=callbacks)
+
+    print(f"\n🔹 Distilling into the whole {args.student}...")
+    backbone.trainable = True
+    student.compile(optimizer=tf.keras.optimizers.Adam(args.lr), loss=loss, metrics=[label_accuracy(num_classes)])
+    student.fit(train_ds, validation_data=val_ds, epochs=args.epochs, callbacks=callbacks)
+
+    export(student, args.out_dir, class_names)
+    print(f"✅ Student saved as: {args.out_dir}/ (with class_names.json)")
+
+    print("\n🔹 Accuracy vs latency (serving path)...")
+    paths, labels = list_val_set(args.val_dir)
+    report = {"student": args.student, "img_size": args.img_size, "temperature": args.temperature, "alpha": args.alpha}
+    for name, path in (("teacher", args.teacher), ("student", args.out_dir)):
+        report[name] = profile(path, paths, labels, args.batch_size, args.latency_iterations)
+    print(f"\n{'model':<10} {'top-1':>7} {'top-3':>7} {'p50 ms':>8} {'p95 ms':>8} {'img/s':>8} {'MB':>7}")
+    for name in ("teacher", "student"):
+        r = report[name]
+        print(f"{name:<10} {r['top1']:>7.4f} {r['top3']:>7.4f} {r['latency_ms_p50']:>8.1f} {r['latency_ms_p95']:>8.1f} "
+              f"{r['images_per_sec']:>8.1f} {r['size_bytes'] / 1e6:>7.1f}")
+    teacher, student_r = report["teacher"], report["student"]
+    print(f"\nstudent: {teacher['latency_ms_p50'] / student_r['latency_ms_p50']:.1f}x faster at batch 1, "
+          f"top-1 {student_r['top1'] - teacher['top1']:+.4f}")
+    with open(os.path.join(args.out_dir, "distillation_report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
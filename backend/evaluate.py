@@ -0,0 +1,213 @@
+# evaluate.py
+# Score the artifact serve.py loads on dataset_split/val, through serve.py's
+# own preprocessing: top-1/top-3 accuracy, a per-class confusion matrix and
+# images/sec. This is the accuracy gate for speed work.
+#   python evaluate.py [--backend savedmodel] [--model-path dog_model] [--batch-size 64]
+#                      [--out eval.json] [--baseline eval_baseline.json --max-top1-drop 0.005]
+# It also checks whether serving's [0, 1] pixels match what the model was
+# trained on: train.py feeds EfficientNet's preprocess_input, a passthrough
+# that leaves pixels in [0, 255] for the model's own Rescaling layer.
+import argparse, glob, json, os, sys, time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from backends import BACKENDS, INFERENCE_BACKEND, backend_model_path, create_backend
+from pack_dataset import load_class_names
+from preprocess import IMG_SIZE, preprocess_into
+from startup import warm_up
+
+APP_ROOT = os.path.abspath(os.path.dirname(__file__))
+VAL_DIR = os.path.join(APP_ROOT, "dataset_split", "val")
+LABELS_PATH = os.path.join(APP_ROOT, "labels.json")
+EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+# -----------------------------
+# DATA
+# -----------------------------
+def list_val_set(val_dir=VAL_DIR, labels_path=LABELS_PATH):
+    """(paths, class indices) for every image under `val_dir`/<breed>/, using serve.py's labels."""
+    with open(labels_path, "r") as f:
+        class_indices = json.load(f)
+    paths, labels = [], []
+    for breed in sorted(os.listdir(val_dir)):
+        if breed not in class_indices:
+            print(f"⚠️  Skipping {breed}: not in {os.path.basename(labels_path)}")
+            continue
+        for path in sorted(glob.glob(os.path.join(val_dir, breed, "*"))):
+            if path.lower().endswith(EXTENSIONS):
+                paths.append(path)
+                labels.append(int(class_indices[breed]))
+    return paths, np.array(labels, dtype=np.int64)
+
+
+def batches(paths, batch_size, workers=None, size=IMG_SIZE):
+    """Yield (start, float32 batch) with serve.py's preprocessing.
+
+    Images are decoded on `workers` threads straight into the batch buffer,
+    and the next batch is already decoding while the caller runs this one.
+    """
+    with ThreadPoolExecutor(workers) as pool:
+        def submit(start):
+            chunk = paths[start:start + batch_size]
+            out = np.empty((len(chunk), size, size, 3), dtype=np.float32)
+            return start, out, [pool.submit(preprocess_into, path, out[i]) for i, path in enumerate(chunk)]
+
+        starts = list(range(0, len(paths), batch_size))
+        pending = submit(starts[0]) if starts else None
+        for next_start in starts[1:] + [None]:
+            start, out, decodes = pending
+            for decode in decodes:
+                decode.result()
+            pending = submit(next_start) if next_start is not None else None
+            yield start, out
+
+
+# -----------------------------
+# METRICS
+# -----------------------------
+def accuracy(run_batch, paths, labels, batch_size=32, workers=None, confusion=None):
+    """Top-1 / top-3 accuracy of `run_batch` with serving preprocessing.
+
+    `images_per_sec` counts inference only; `end_to_end_images_per_sec`
+    includes decoding that inference did not hide. Pass a (classes, classes)
+    int array as `confusion` to have it filled (rows: true, columns: top-1).
+    """
+    top1 = top3 = 0
+    infer_seconds = 0.0
+    t_start = time.perf_counter()
+    for start, x in batches(paths, batch_size, workers):
+        y = labels[start:start + len(x)]
+        t0 = time.perf_counter()
+        probs = np.asarray(run_batch(x))
+        infer_seconds += time.perf_counter() - t0
+        best = np.argsort(probs, axis=1)[:, -3:]
+        top1 += int((best[:, -1] == y).sum())
+        top3 += int((best == y[:, None]).any(axis=1).sum())
+        if confusion is not None:
+            np.add.at(confusion, (y, best[:, -1]), 1)
+    elapsed = time.perf_counter() - t_start
+    n = max(1, len(paths))
+    return {"top1": top1 / n, "top3": top3 / n, "images": len(paths),
+            "images_per_sec": len(paths) / infer_seconds if infer_seconds else 0.0,
+            "end_to_end_images_per_sec": len(paths) / elapsed if elapsed else 0.0}
+
+
+def per_class(confusion, class_names):
+    """Recall and the most frequent wrong prediction for every class with validation images."""
+    rows = []
+    for i, counts in enumerate(confusion):
+        support = int(counts.sum())
+        if not support:
+            continue
+        wrong = counts.copy()
+        wrong[i] = 0
+        confused = int(np.argmax(wrong))
+        rows.append({"class": class_names[i], "support": support, "top1": counts[i] / support,
+                     "confused_with": class_names[confused] if wrong[confused] else None,
+                     "confused_count": int(wrong[confused])})
+    return rows
+
+
+def check_preprocessing(run_batch, paths, labels, sample=64, margin=0.05):
+    """Score an evenly spread sample with serve.py's [0, 1] pixels and with
+    train.py's [0, 255] ones (same decode, scaled back up).
+
+    A model trained on the other range still answers, just badly and with low
+    confidence, so serving's scaling is flagged when the training range wins
+    on top-1 accuracy or mean confidence by more than `margin`.
+    """
+    picks = np.unique(np.linspace(0, len(paths) - 1, min(sample, len(paths))).astype(int))
+    _, x = next(batches([paths[i] for i in picks], len(picks)))
+    y = labels[picks]
+    results = {}
+    for name, batch in (("serve_0_1", x), ("train_0_255", x * np.float32(255.0))):
+        probs = np.asarray(run_batch(batch))
+        results[name] = {"top1": float((probs.argmax(axis=1) == y).mean()),
+                         "mean_confidence": float(probs.max(axis=1).mean()),
+                         "predictions": probs.argmax(axis=1)}
+    serve, train = results["serve_0_1"], results["train_0_255"]
+    return {
+        "images": len(picks),
+        "serve_0_1": {k: v for k, v in serve.items() if k != "predictions"},
+        "train_0_255": {k: v for k, v in train.items() if k != "predictions"},
+        "agreement": float((serve["predictions"] == train["predictions"]).mean()),
+        "mismatch": train["top1"] > serve["top1"] + margin
+                    or train["mean_confidence"] > serve["mean_confidence"] + margin,
+    }
+
+
+# -----------------------------
+# MAIN
+# -----------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the served model on dataset_split/val.")
+    parser.add_argument("--backend", default=INFERENCE_BACKEND, choices=sorted(BACKENDS))
+    parser.add_argument("--model-path", help="default: the artifact serve.py loads for --backend")
+    parser.add_argument("--val-dir", default=VAL_DIR)
+    parser.add_argument("--labels", default=LABELS_PATH)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=None, help="decode threads (default: Python's pool size)")
+    parser.add_argument("--mismatch-sample", type=int, default=64, help="images used for the preprocessing check")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare against this stored JSON report")
+    parser.add_argument("--max-top1-drop", type=float, default=0.005, help="allowed absolute top-1 drop")
+    parser.add_argument("--max-top3-drop", type=float, default=0.005, help="allowed absolute top-3 drop")
+    args = parser.parse_args()
+
+    paths, labels = list_val_set(args.val_dir, args.labels)
+    if not paths:
+        raise SystemExit(f"No validation images found in {args.val_dir}")
+    if len(paths) < 200:
+        print(f"⚠️  Only {len(paths)} validation images: accuracy is coarse")
+    class_names = load_class_names(args.labels)
+    model_path = args.model_path or backend_model_path(args.backend)
+
+    print(f"🔹 Loading {args.backend} model from {model_path}...")
+    backend = create_backend(args.backend, model_path)
+    warm_up(backend, [args.batch_size])
+
+    print("🔹 Checking train/serve preprocessing...")
+    check = check_preprocessing(backend, paths, labels, args.mismatch_sample)
+    print(f"   [0, 1] (serving): top-1 {check['serve_0_1']['top1']:.3f}, confidence {check['serve_0_1']['mean_confidence']:.3f}")
+    print(f"   [0, 255] (train.py): top-1 {check['train_0_255']['top1']:.3f}, confidence {check['train_0_255']['mean_confidence']:.3f}")
+    if check["mismatch"]:
+        print("⚠️  Preprocessing mismatch: the model does better on train.py's [0, 255] pixels than on the "
+              "[0, 1] pixels serve.py feeds it")
+
+    print(f"🔹 Evaluating {len(paths)} images in batches of {args.batch_size}...")
+    confusion = np.zeros((len(class_names), len(class_names)), dtype=np.int64)
+    metrics = accuracy(backend, paths, labels, args.batch_size, args.workers, confusion)
+    classes = per_class(confusion, class_names)
+
+    print(f"\n{'class':<32} {'n':>5} {'top-1':>7}  most confused with")
+    for row in sorted(classes, key=lambda r: r["top1"]):
+        confused = f"{row['confused_with']} ({row['confused_count']})" if row["confused_with"] else "-"
+        print(f"{row['class']:<32} {row['support']:>5} {row['top1']:>7.3f}  {confused}")
+    print(f"\ntop-1 {metrics['top1']:.4f}  top-3 {metrics['top3']:.4f}  "
+          f"{metrics['images_per_sec']:.1f} img/s inference, {metrics['end_to_end_images_per_sec']:.1f} img/s end to end")
+
+    report = {
+        "backend": args.backend, "model_path": model_path, "batch_size": args.batch_size,
+        **metrics,
+        "preprocessing_check": check,
+        "per_class": classes,
+        "class_names": class_names,
+        "confusion": confusion.tolist(),
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        top1_drop, top3_drop = baseline["top1"] - metrics["top1"], baseline["top3"] - metrics["top3"]
+        print(f"vs baseline: top-1 {metrics['top1'] - baseline['top1']:+.4f}  top-3 {metrics['top3'] - baseline['top3']:+.4f}  "
+              f"img/s {metrics['images_per_sec'] / baseline['images_per_sec'] - 1:+.1%}")
+        if top1_drop > args.max_top1_drop or top3_drop > args.max_top3_drop:
+            print("❌ Accuracy dropped beyond the allowed threshold")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
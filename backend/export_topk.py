@@ -0,0 +1,54 @@
+# export_topk.py
+# Re-export dog_model/ with a serving signature that returns only the top-k
+# class indices and scores, so the full probability vector never leaves the
+# graph.
+#   python export_topk.py [--k 3] [--out-dir dog_model_topk]
+# Serve it with SAVEDMODEL_PATH=dog_model_topk; TOP_K may be at most the
+# exported k. The full distribution stays available as the "probabilities"
+# signature for quantize.py and the benchmarks.
+import argparse, os, shutil
+import tensorflow as tf
+from backends import APP_ROOT, MODEL_DIR
+
+OUT_DIR = os.path.join(APP_ROOT, "dog_model_topk")
+
+
+class TopKModel(tf.Module):
+    def __init__(self, model_dir, k):
+        super().__init__()
+        self.model = tf.saved_model.load(model_dir)
+        self.k = k
+        infer = self.model.signatures["serving_default"]
+        self._infer = infer
+        self._output_key = sorted(infer.structured_outputs)[0]
+
+    @tf.function(input_signature=[tf.TensorSpec([None, 224, 224, 3], tf.float32, name="image")])
+    def probabilities(self, image):
+        return {"probabilities": self._infer(image)[self._output_key]}
+
+    @tf.function(input_signature=[tf.TensorSpec([None, 224, 224, 3], tf.float32, name="image")])
+    def top_k(self, image):
+        top = tf.math.top_k(self._infer(image)[self._output_key], k=self.k)
+        return {"indices": top.indices, "scores": top.values}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export dog_model with a top-k serving signature.")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--out-dir", default=OUT_DIR)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    module = TopKModel(args.model_dir, args.k)
+    tf.saved_model.save(module, args.out_dir, signatures={
+        "serving_default": module.top_k,
+        "probabilities": module.probabilities,
+    })
+    class_names = os.path.join(args.model_dir, "class_names.json")
+    if os.path.exists(class_names):
+        shutil.copy(class_names, args.out_dir)
+    print(f"✅ Exported top-{args.k} model to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# feature_cache.py
+# Pooled EfficientNetB0 features computed once and stored on disk, so the
+# classifier head can be trained (and its hyperparameters swept) without
+# running the frozen backbone every epoch.
+#   python feature_cache.py --cache features --dropout 0.2 0.4 --lr 1e-3 3e-4
+# train.py builds the cache itself when FEATURE_CACHE is set; this CLI only
+# sweeps heads over an existing one.
+import argparse, itertools, json, os
+import numpy as np
+import tensorflow as tf
+
+FEATURE_DIM = 1280
+
+
+def extract(feature_model, dataset):
+    """(features, labels) for every batch of (images, one-hot labels) in `dataset`."""
+    features, labels = [], []
+    for images, onehot in dataset:
+        features.append(feature_model(images, training=False).numpy())
+        labels.append(np.argmax(onehot.numpy(), axis=1).astype(np.int32))
+    return np.concatenate(features), np.concatenate(labels)
+
+
+def save_split(cache_dir, split, features, labels):
+    np.save(os.path.join(cache_dir, f"{split}-features.npy"), features.astype(np.float32))
+    np.save(os.path.join(cache_dir, f"{split}-labels.npy"), labels)
+
+
+def load_split(cache_dir, split):
+    return (np.load(os.path.join(cache_dir, f"{split}-features.npy"), mmap_mode="r"),
+            np.load(os.path.join(cache_dir, f"{split}-labels.npy")))
+
+
+def read_meta(cache_dir):
+    path = os.path.join(cache_dir, "meta.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def build_cache(cache_dir, feature_model, meta, plain_train, val, augmented_train=None, copies=0):
+    """Run the frozen backbone over the training set once without augmentation
+    plus `copies` times with it, and over the validation set once.
+
+    `meta` describes what the features depend on (class names, image size,
+    data source...); `ensure_cache` rebuilds whenever it changes.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path = os.path.join(cache_dir, "meta.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    print("   extracting training features...")
+    parts = [extract(feature_model, plain_train)]
+    for copy in range(copies):
+        print(f"   extracting augmented copy {copy + 1}/{copies}...")
+        parts.append(extract(feature_model, augmented_train))
+    save_split(cache_dir, "train", np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts]))
+    print("   extracting validation features...")
+    save_split(cache_dir, "val", *extract(feature_model, val))
+
+    with open(meta_path, "w") as f:
+        json.dump(dict(meta, copies=copies), f, indent=2)
+
+
+def ensure_cache(cache_dir, feature_model, meta, plain_train, val, augmented_train=None, copies=0):
+    if read_meta(cache_dir) == dict(meta, copies=copies):
+        print(f"   reusing cached features in {cache_dir}")
+        return
+    build_cache(cache_dir, feature_model, meta, plain_train, val, augmented_train, copies)
+
+
+def feature_dataset(features, labels, num_classes, batch_size=32, training=False):
+    dataset = tf.data.Dataset.from_tensor_slices((np.asarray(features), tf.one_hot(labels, num_classes)))
+    if training:
+        dataset = dataset.shuffle(len(labels), reshuffle_each_iteration=True)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def build_head(num_classes, dropout=0.4):
+    """The Dropout + Dense classifier from train.py, on pooled features."""
+    inputs = tf.keras.Input((FEATURE_DIM,))
+    x = tf.keras.layers.Dropout(dropout)(inputs)
+    outputs = tf.keras.layers.Dense(num_classes, activation="softmax")(x)
+    return tf.keras.Model(inputs, outputs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep classifier heads over cached backbone features.")
+    parser.add_argument("--cache", default="features")
+    parser.add_argument("--dropout", nargs="+", type=float, default=[0.4])
+    parser.add_argument("--lr", nargs="+", type=float, default=[1e-3])
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    meta = read_meta(args.cache)
+    if meta is None:
+        raise SystemExit(f"No feature cache in {args.cache}; run train.py with FEATURE_CACHE set first")
+    num_classes = len(meta["class_names"])
+    train = feature_dataset(*load_split(args.cache, "train"), num_classes, args.batch_size, training=True)
+    val = feature_dataset(*load_split(args.cache, "val"), num_classes, args.batch_size)
+
+    results = []
+    for dropout, lr in itertools.product(args.dropout, args.lr):
+        head = build_head(num_classes, dropout)
+        head.compile(optimizer=tf.keras.optimizers.Adam(lr), loss="categorical_crossentropy", metrics=["accuracy"])
+        history = head.fit(train, validation_data=val, epochs=args.epochs, verbose=0, callbacks=[
+            tf.keras.callbacks.EarlyStopping(monitor="val_loss", patience=4, restore_best_weights=True)])
+        best = int(np.argmin(history.history["val_loss"]))
+        results.append((dropout, lr, history.history["val_loss"][best], history.history["val_accuracy"][best]))
+        print(f"dropout {dropout:<5} lr {lr:<8g} val_loss {results[-1][2]:.4f}  val_acc {results[-1][3]:.4f}")
+
+    dropout, lr, _, acc = min(results, key=lambda r: r[2])
+    print(f"\nBest: dropout {dropout}, lr {lr:g} (val_acc {acc:.4f})")
+
+
+if __name__ == "__main__":
+    main()
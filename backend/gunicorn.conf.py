@@ -0,0 +1,99 @@
+import os, signal, subprocess, sys, threading, time
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+# INFERENCE_MODE=remote runs one `inference.py` process that owns the model
+# and lets WEB_CONCURRENCY HTTP workers forward tensors to it over a Unix
+# socket, so request parsing / decode / JSON scale across cores while only
+# one copy of the SavedModel is resident.
+INFERENCE_MODE = os.environ.get("INFERENCE_MODE", "local")
+INFERENCE_SOCKET = os.environ.get("INFERENCE_SOCKET", "/tmp/pawprint-inference.sock")
+INFERENCE_START_TIMEOUT = float(os.environ.get("INFERENCE_START_TIMEOUT", 300))
+# A dead inference server is restarted, unless it died this soon after its
+# own start: a crash loop shuts gunicorn down instead.
+INFERENCE_MIN_UPTIME = float(os.environ.get("INFERENCE_MIN_UPTIME", 60))
+# MODEL_LOAD=background binds the port straight away and loads the model on a
+# thread in each worker; /readyz turns 200 once it is loaded and warmed.
+MODEL_LOAD = os.environ.get("MODEL_LOAD", "eager")
+
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+# Eager loading happens before the worker answers its first heartbeat, so it
+# needs the long timeout; background workers boot in well under a second.
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60 if MODEL_LOAD == "background" else 300))
+# Only remote mode preloads: its workers never import TensorFlow, so the app
+# is cheap to import once in the master. TensorFlow's thread pools do not
+# survive fork (a model loaded in the master hangs on first use in a worker),
+# and the background loader thread would not either, so local mode loads the
+# model in each worker.
+preload_app = INFERENCE_MODE == "remote" and MODEL_LOAD != "background"
+
+_inference_proc = None
+_inference_started = 0.0
+_stopping = threading.Event()
+
+
+# -----------------------------
+# HOOKS
+# -----------------------------
+def _start_inference():
+    global _inference_proc, _inference_started
+    if os.path.exists(INFERENCE_SOCKET):
+        os.unlink(INFERENCE_SOCKET)
+    backend_dir = os.path.abspath(os.path.dirname(__file__))
+    _inference_proc = subprocess.Popen(
+        [sys.executable, os.path.join(backend_dir, "inference.py")],
+        cwd=backend_dir,
+        env=dict(os.environ, INFERENCE_SOCKET=INFERENCE_SOCKET),
+    )
+    _inference_started = time.monotonic()
+
+
+def _watch_inference(server):
+    # Runs in the master: workers only notice a dead server through failing
+    # requests (and /readyz), so the master restarts it.
+    while not _stopping.wait(1.0):
+        code = _inference_proc.poll()
+        if code is None:
+            continue
+        if time.monotonic() - _inference_started < INFERENCE_MIN_UPTIME:
+            server.log.error("Inference server exited with code %s right after starting; shutting down", code)
+            os.kill(os.getpid(), signal.SIGTERM)
+            return
+        server.log.warning("Inference server exited with code %s; restarting", code)
+        _start_inference()
+
+
+def on_starting(server):
+    if INFERENCE_MODE != "remote":
+        return
+    _start_inference()
+    if MODEL_LOAD == "background":
+        # Workers report not-ready until the server answers on its socket.
+        server.log.info("Inference server starting (pid %s)", _inference_proc.pid)
+        return
+    deadline = time.monotonic() + INFERENCE_START_TIMEOUT
+    while not os.path.exists(INFERENCE_SOCKET):
+        if _inference_proc.poll() is not None:
+            raise RuntimeError(f"inference server exited with code {_inference_proc.returncode}")
+        if time.monotonic() > deadline:
+            _inference_proc.terminate()
+            raise RuntimeError("inference server did not start in time")
+        time.sleep(0.2)
+    server.log.info("Inference server ready on %s (pid %s)", INFERENCE_SOCKET, _inference_proc.pid)
+
+
+def when_ready(server):
+    if _inference_proc is not None:
+        threading.Thread(target=_watch_inference, args=(server,), name="inference-watch", daemon=True).start()
+
+
+def on_exit(server):
+    _stopping.set()
+    if _inference_proc is not None and _inference_proc.poll() is None:
+        _inference_proc.terminate()
+        try:
+            _inference_proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            _inference_proc.kill()
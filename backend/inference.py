@@ -0,0 +1,193 @@
+import os, io, json, socket, socketserver, struct, threading
+import numpy as np
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+INFERENCE_SOCKET = os.environ.get("INFERENCE_SOCKET", "/tmp/pawprint-inference.sock")
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 8))
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", 5))
+# Seconds an HTTP worker waits for a reply before giving up on the server
+INFERENCE_TIMEOUT = float(os.environ.get("INFERENCE_TIMEOUT", 30))
+
+# Frame = 1 byte kind + 8 byte big-endian payload length + payload.
+# Requests:  b"P" npy batch -> b"A" npy top-k rows,  b"S" -> b"J" json stats
+# Errors come back as b"E" with a utf-8 message.
+_HEADER = struct.Struct(">cQ")
+
+
+# -----------------------------
+# WIRE FORMAT
+# -----------------------------
+def _recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    while n:
+        got = sock.recv_into(view[len(buf) - n:], n)
+        if not got:
+            raise ConnectionError("inference socket closed")
+        n -= got
+    return buf
+
+
+def _send_frame(sock, kind, payload=b""):
+    sock.sendall(_HEADER.pack(kind, len(payload)) + payload)
+
+
+def _recv_frame(sock):
+    kind, size = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return kind, _recv_exact(sock, size)
+
+
+def _dump_array(arr):
+    buf = io.BytesIO()
+    np.save(buf, np.ascontiguousarray(arr), allow_pickle=False)
+    return buf.getvalue()
+
+
+def _load_array(payload):
+    return np.load(io.BytesIO(payload), allow_pickle=False)
+
+
+# -----------------------------
+# CLIENT (HTTP workers)
+# -----------------------------
+class InferenceUnavailable(ConnectionError):
+    """The inference server could not be reached or did not answer in time."""
+
+
+class InferenceClient:
+    """Forwards preprocessed batches to the inference process over a Unix socket.
+
+    Each thread keeps its own persistent connection; a broken connection is
+    re-opened once before the error is surfaced to the caller. A server that
+    does not answer within `timeout` seconds is not retried.
+    """
+
+    def __init__(self, socket_path=INFERENCE_SOCKET, timeout=INFERENCE_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _reset(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def _call(self, kind, payload=b""):
+        for attempt in (0, 1):
+            try:
+                sock = self._connection()
+                _send_frame(sock, kind, payload)
+                reply_kind, reply = _recv_frame(sock)
+                break
+            except socket.timeout as e:
+                # A late reply would land on the next request: drop the connection.
+                self._reset()
+                raise InferenceUnavailable(f"inference server did not answer in {self.timeout:g}s") from e
+            except OSError as e:
+                self._reset()
+                if attempt:
+                    raise InferenceUnavailable(f"inference server unreachable: {e}") from e
+        if reply_kind == b"E":
+            raise RuntimeError(f"inference server error: {bytes(reply).decode('utf-8')}")
+        return reply_kind, reply
+
+    def run_batch(self, x):
+        _, reply = self._call(b"P", _dump_array(x))
+        return _load_array(reply)
+
+    def submit(self, x):
+        """Single-image counterpart of `MicroBatcher.submit`; batching happens server side."""
+        return self.run_batch(x[None])[0]
+
+    def stats(self):
+        _, reply = self._call(b"S")
+        return json.loads(bytes(reply).decode("utf-8"))
+
+
+def ping(socket_path=INFERENCE_SOCKET, timeout=1.0):
+    """True if an inference server answers a stats request on `socket_path`.
+
+    A fresh connection each time: a socket file left behind by a killed
+    server exists but refuses connections.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            _send_frame(sock, b"S")
+            kind, _ = _recv_frame(sock)
+            return kind == b"J"
+    except (OSError, struct.error):
+        return False
+
+
+# -----------------------------
+# SERVER (owns the model)
+# -----------------------------
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                kind, payload = _recv_frame(self.request)
+            except ConnectionError:
+                return
+            try:
+                if kind == b"P":
+                    x = _load_array(payload)
+                    if x.shape[0] == 1:
+                        out = self.server.batcher.submit(x[0])[None]
+                    else:
+                        out = self.server.run_batch(x)
+                    _send_frame(self.request, b"A", _dump_array(out))
+                elif kind == b"S":
+                    _send_frame(self.request, b"J", json.dumps(self.server.batcher.stats()).encode("utf-8"))
+                else:
+                    _send_frame(self.request, b"E", f"unknown request {kind!r}".encode("utf-8"))
+            except Exception as e:
+                _send_frame(self.request, b"E", str(e).encode("utf-8"))
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, run_batch, batcher):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.run_batch = run_batch
+        self.batcher = batcher
+        super().__init__(socket_path, _Handler)
+
+
+def serve_forever(socket_path=INFERENCE_SOCKET):
+    from backends import BACKENDS, INFERENCE_BACKEND, TOP_K, backend_model_path
+    from batching import MicroBatcher
+    from startup import ModelLoader
+
+    # Warm up before binding: web workers treat the socket's existence as
+    # "ready", so it must not appear until the first request would be fast.
+    run_batch = ModelLoader(BACKENDS[INFERENCE_BACKEND], backend_model_path(), top_k=TOP_K).start().run_batch
+    batcher = MicroBatcher(run_batch, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS)
+    server = InferenceServer(socket_path, run_batch, batcher)
+    print(f"✅ Inference server listening on {socket_path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    serve_forever()
@@ -0,0 +1,400 @@
+# loadtest.py
+# Start serve.py under gunicorn and drive /predict and /generate_pdf at fixed
+# concurrency (closed loop) and fixed arrival rates (open loop), using the
+# images in static/uploads and dataset_split/val.
+#   python loadtest.py [--workers 1 --threads 8 --inference-mode local]
+#                      [--concurrency 1 8] [--rates 5 20] [--duration 20]
+#                      [--out results.json] [--baseline loadtest_baseline.json]
+# Results (throughput, p50/p95/p99, error rate, peak RSS of the whole server
+# process tree) are written as JSON; with --baseline the run is compared to a
+# stored result and exits 1 on a regression beyond --max-regression.
+# Create a baseline with --out loadtest_baseline.json on a known-good commit.
+# Reports rendered during the run are stored in static/reports like any others
+# (bounded by REPORT_CACHE_MAX_BYTES); add --env REPORT_DISK_CACHE=0 to skip it.
+# With --delivery async each /generate_pdf request is followed to the finished
+# PDF (status polls, then the download), so its latency is end to end; queue-full
+# 429s are counted separately from other errors.
+import argparse, http.client, json, os, queue, random, socket, subprocess, sys, tempfile, threading, time, uuid
+from urllib.parse import urlsplit
+import numpy as np
+from bench_backends import DEFAULT_IMAGE_DIRS, collect_images
+
+APP_ROOT = os.path.abspath(os.path.dirname(__file__))
+BREEDS = ["beagle", "pug", "Aspin", "golden_retriever", "Chihuahua", "whippet"]
+
+
+# -----------------------------
+# SERVER
+# -----------------------------
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, workers, threads, inference_mode, extra_env):
+    env = dict(os.environ, INFERENCE_MODE=inference_mode, WEB_CONCURRENCY=str(workers),
+               GUNICORN_THREADS=str(threads))
+    env.update(extra_env)
+    if inference_mode == "remote":
+        env.setdefault("INFERENCE_SOCKET", f"/tmp/pawprint-loadtest-{port}.sock")
+    cmd = [sys.executable, "-m", "gunicorn", "serve:app", "-c", "gunicorn.conf.py",
+           "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--threads", str(threads)]
+    # Server logs go to a file: an undrained pipe would fill up and stall it.
+    log = tempfile.TemporaryFile()
+    proc = subprocess.Popen(cmd, cwd=APP_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    proc.log = log
+    return proc
+
+
+def server_log(proc, limit=2000):
+    proc.log.seek(0)
+    return proc.log.read().decode(errors="replace")[-limit:]
+
+
+def wait_ready(host, port, proc, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}:\n{server_log(proc)}")
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request("GET", "/readyz")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError("server did not become ready in time")
+
+
+def tree_rss_mb(pid):
+    """Resident memory of `pid` and all of its descendants."""
+    total, stack = 0, [pid]
+    while stack:
+        p = stack.pop()
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+            for task in os.listdir(f"/proc/{p}/task"):
+                with open(f"/proc/{p}/task/{task}/children") as f:
+                    stack += [int(c) for c in f.read().split()]
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return total / 1024.0
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, pid, interval=0.2):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0.0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            self.peak = max(self.peak, tree_rss_mb(self.pid))
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        return self.peak
+
+
+# -----------------------------
+# REQUESTS
+# -----------------------------
+def multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, data) in files.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                     f'Content-Type: application/octet-stream\r\n\r\n'.encode() + data + b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class RequestFactory:
+    """Builds request bodies from the image corpus.
+
+    With `bust_caches`, every upload gets random trailing bytes (ignored by
+    image decoders) and every report a unique confidence, so the prediction
+    and report caches never short-circuit the work being measured.
+    """
+
+    def __init__(self, images, bust_caches=True, delivery="stream"):
+        self.images = [(os.path.basename(p), open(p, "rb").read()) for p in images]
+        self.bust_caches = bust_caches
+        self.delivery = delivery
+
+    def _image(self, rng):
+        filename, data = rng.choice(self.images)
+        if self.bust_caches:
+            data = data + os.urandom(16)
+        return filename, data
+
+    def follows(self, endpoint):
+        """Whether `endpoint` answers with a job to follow rather than the result."""
+        return endpoint == "generate_pdf" and self.delivery == "async"
+
+    def build(self, endpoint, rng):
+        if endpoint == "predict":
+            return ("/predict",) + multipart({}, {"image": self._image(rng)})
+        confidence = rng.random() if self.bust_caches else 0.9
+        fields = {"breed": rng.choice(BREEDS), "confidence": f"{confidence:.6f}", "delivery": self.delivery}
+        return ("/generate_pdf",) + multipart(fields, {"image": self._image(rng)})
+
+
+def send(conn_holder, host, port, path, body=None, content_type=None):
+    """POST (GET without a body) and read the whole response; returns
+    (status, body), status 0 on connection error."""
+    for attempt in (0, 1):
+        conn = conn_holder.get("conn") or http.client.HTTPConnection(host, port, timeout=120)
+        conn_holder["conn"] = conn
+        try:
+            if body is None:
+                conn.request("GET", path)
+            else:
+                conn.request("POST", path, body=body, headers={"Content-Type": content_type})
+            response = conn.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn_holder["conn"] = None
+            if attempt:
+                return 0, b""
+    return 0, b""
+
+
+def await_report(conn_holder, host, port, reply, poll_interval=0.05, timeout=120.0):
+    """Follow an async /generate_pdf reply: poll its status URL until the job
+    is done, then download the PDF. Returns the final HTTP status; a failed
+    job counts as 500 and one still pending after `timeout` as 504."""
+    deadline = time.perf_counter() + timeout
+    status_path = urlsplit(reply.get("status_url", "")).path
+    while "pdf_url" not in reply:
+        if reply.get("status") == "failed":
+            return 500
+        if time.perf_counter() > deadline:
+            return 504
+        time.sleep(poll_interval)
+        status, data = send(conn_holder, host, port, status_path)
+        if status != 200:
+            return status
+        reply = json.loads(data)
+    return send(conn_holder, host, port, urlsplit(reply["pdf_url"]).path)[0]
+
+
+def execute(conn_holder, host, port, request, follow_report=False):
+    """Send one built request; returns its status. With `follow_report`, an
+    accepted async report is awaited through to the downloaded PDF."""
+    path, body, content_type = request
+    status, data = send(conn_holder, host, port, path, body, content_type)
+    if follow_report and status in (200, 202):
+        status = await_report(conn_holder, host, port, json.loads(data))
+    return status
+
+
+# -----------------------------
+# LOAD PATTERNS
+# -----------------------------
+def closed_loop(host, port, factory, endpoint, concurrency, duration):
+    """`concurrency` clients sending back-to-back for `duration` seconds."""
+    results, lock = [], threading.Lock()
+    deadline = time.perf_counter() + duration
+    follow = factory.follows(endpoint)
+
+    def client(seed):
+        rng, holder, local = random.Random(seed), {}, []
+        while time.perf_counter() < deadline:
+            request = factory.build(endpoint, rng)
+            t0 = time.perf_counter()
+            status = execute(holder, host, port, request, follow)
+            local.append((time.perf_counter() - t0, status))
+        with lock:
+            results.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def open_loop(host, port, factory, endpoint, rate, duration, max_in_flight):
+    """Requests issued every 1/`rate` seconds regardless of how fast the server
+    answers. Latency is measured from the scheduled send time, so queueing
+    inside the client counts (no coordinated omission).
+    """
+    schedule = queue.Queue()
+    results, lock = [], threading.Lock()
+    follow = factory.follows(endpoint)
+    start = time.perf_counter() + 0.1
+    for i in range(int(rate * duration)):
+        schedule.put(start + i / rate)
+
+    def client(seed):
+        rng, holder, local = random.Random(seed), {}, []
+        while True:
+            try:
+                scheduled = schedule.get_nowait()
+            except queue.Empty:
+                break
+            request = factory.build(endpoint, rng)
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            status = execute(holder, host, port, request, follow)
+            local.append((time.perf_counter() - scheduled, status))
+        with lock:
+            results.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(max_in_flight)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def summarize(results, wall_seconds):
+    latencies = np.array([r[0] for r in results]) * 1000.0
+    errors = sum(1 for _, status in results if not 200 <= status < 300)
+    summary = {"requests": len(results), "errors": errors,
+               "queue_full": sum(1 for _, status in results if status == 429),
+               "error_rate": errors / len(results) if results else 0.0,
+               "throughput_rps": (len(results) - errors) / wall_seconds if wall_seconds else 0.0}
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        summary["latency_ms"] = {"p50": p50, "p95": p95, "p99": p99,
+                                 "mean": float(latencies.mean()), "max": float(latencies.max())}
+    return summary
+
+
+# -----------------------------
+# BASELINE
+# -----------------------------
+def compare(results, baseline, max_regression):
+    """Print per-scenario deltas; returns the scenarios that regressed."""
+    previous = {s["name"]: s for s in baseline.get("scenarios", [])}
+    regressed = []
+    print(f"\n{'scenario':<28} {'rps':>9} {'Δ':>7} {'p95 ms':>9} {'Δ':>7} {'errors':>7}")
+    for s in results["scenarios"]:
+        old = previous.get(s["name"])
+        if old is None or "latency_ms" not in s or "latency_ms" not in old:
+            continue
+        d_rps = s["throughput_rps"] / old["throughput_rps"] - 1 if old["throughput_rps"] else 0.0
+        d_p95 = s["latency_ms"]["p95"] / old["latency_ms"]["p95"] - 1 if old["latency_ms"]["p95"] else 0.0
+        flag = ""
+        # Open-loop throughput is pinned to the arrival rate; judge it on latency.
+        if d_p95 > max_regression or (s["mode"] == "concurrency" and d_rps < -max_regression) \
+                or s["error_rate"] > old["error_rate"] + 0.01:
+            regressed.append(s["name"])
+            flag = "  ❌"
+        print(f"{s['name']:<28} {s['throughput_rps']:>9.2f} {d_rps:>+7.1%} {s['latency_ms']['p95']:>9.1f} "
+              f"{d_p95:>+7.1%} {s['error_rate']:>7.2%}{flag}")
+    if "peak_rss_mb" in baseline and baseline["peak_rss_mb"]:
+        print(f"\npeak RSS {results['peak_rss_mb']:.0f} MB ({results['peak_rss_mb'] / baseline['peak_rss_mb'] - 1:+.1%})")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test /predict and /generate_pdf.")
+    parser.add_argument("--url", help="test an already running server (host:port) instead of starting one")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--inference-mode", choices=["local", "remote"], default="local")
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE", help="extra server environment")
+    parser.add_argument("--endpoints", nargs="+", default=["predict", "generate_pdf"], choices=["predict", "generate_pdf"])
+    parser.add_argument("--concurrency", nargs="*", type=int, default=[1, 8])
+    parser.add_argument("--rates", nargs="*", type=float, default=[5.0], help="open-loop requests/sec")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="client threads for open-loop runs")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds of unmeasured load per endpoint")
+    parser.add_argument("--images", nargs="+", default=DEFAULT_IMAGE_DIRS, help="image directories")
+    parser.add_argument("--no-cache-busting", action="store_true", help="let the prediction/report caches hit")
+    parser.add_argument("--delivery", choices=["stream", "async"], default="stream", help="/generate_pdf delivery (async: timed to the downloaded PDF)")
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    parser.add_argument("--out", help="write the JSON results here")
+    parser.add_argument("--baseline", help="compare against this stored JSON result")
+    parser.add_argument("--max-regression", type=float, default=0.10, help="allowed relative p95/throughput change")
+    args = parser.parse_args()
+
+    images = collect_images(args.images)
+    if not images:
+        raise SystemExit(f"No images found in {args.images}")
+    factory = RequestFactory(images, bust_caches=not args.no_cache_busting, delivery=args.delivery)
+
+    proc = None
+    if args.url:
+        host, port = args.url.rsplit(":", 1)
+        port = int(port)
+    else:
+        host, port = "127.0.0.1", free_port()
+        extra_env = dict(kv.split("=", 1) for kv in args.env)
+        proc = start_server(port, args.workers, args.threads, args.inference_mode, extra_env)
+    try:
+        t0 = time.perf_counter()
+        wait_ready(host, port, proc, args.ready_timeout)
+        startup = time.perf_counter() - t0
+        sampler = RssSampler(proc.pid) if proc else None
+        if sampler:
+            sampler.start()
+
+        scenarios = []
+        for endpoint in args.endpoints:
+            if args.warmup:
+                closed_loop(host, port, factory, endpoint, max(args.concurrency or [1]), args.warmup)
+            runs = [("concurrency", c) for c in args.concurrency] + [("rate", r) for r in args.rates]
+            for mode, level in runs:
+                name = f"{endpoint}/{mode}={level:g}"
+                print(f"🔹 {name} for {args.duration:g}s...")
+                t0 = time.perf_counter()
+                if mode == "concurrency":
+                    results = closed_loop(host, port, factory, endpoint, level, args.duration)
+                else:
+                    results = open_loop(host, port, factory, endpoint, level, args.duration, args.max_in_flight)
+                summary = summarize(results, time.perf_counter() - t0)
+                scenarios.append(dict(name=name, endpoint=endpoint, mode=mode, level=level, **summary))
+                lat = summary.get("latency_ms", {})
+                print(f"   {summary['throughput_rps']:.2f} req/s  p50 {lat.get('p50', 0):.1f}  p95 {lat.get('p95', 0):.1f}  "
+                      f"p99 {lat.get('p99', 0):.1f} ms  errors {summary['error_rate']:.2%}"
+                      + (f" ({summary['queue_full']} queue full)" if summary["queue_full"] else ""))
+        peak_rss = sampler.stop() if sampler else None
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    results = {
+        "config": {"workers": args.workers, "threads": args.threads, "inference_mode": args.inference_mode,
+                   "env": args.env, "duration": args.duration, "cache_busting": not args.no_cache_busting,
+                   "delivery": args.delivery, "images": len(images), "url": args.url},
+        "startup_seconds": startup if proc else None,
+        "peak_rss_mb": peak_rss,
+        "scenarios": scenarios,
+    }
+    if peak_rss is not None:
+        print(f"\npeak RSS (server process tree): {peak_rss:.0f} MB")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressed = compare(results, json.load(f), args.max_regression)
+        if regressed:
+            raise SystemExit(f"❌ Regressed beyond {args.max_regression:.0%}: {', '.join(regressed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import bisect, threading, time
+from contextlib import contextmanager
+
+# Latency buckets (seconds) from sub-millisecond cache hits to multi-second
+# PDF renders.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_local = threading.local()
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# -----------------------------
+# METRICS
+# -----------------------------
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram; `observe` is a bisect plus a locked update."""
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            base = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{base} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{base} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Read at scrape time from `fn`, which returns {label values tuple: value}."""
+
+    def __init__(self, name, help, fn, labelnames=(), kind="gauge"):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self.fn().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            try:
+                lines += metric.render()
+            except Exception:
+                continue  # a broken callback must not take /metrics down
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+REQUESTS = REGISTRY.register(Counter(
+    "pawprint_http_requests_total", "HTTP requests by route and status code.", ["route", "code"]))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "pawprint_http_request_duration_seconds", "Time from request start to response.", ["route"]))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "pawprint_stage_duration_seconds", "Time spent in each stage of a request.", ["route", "stage"]))
+
+
+# -----------------------------
+# REQUEST-SCOPED SPANS
+# -----------------------------
+class Trace:
+    """Stage timings for one request.
+
+    Spans recorded while the request is open are kept for the Server-Timing
+    header and flushed into STAGE_SECONDS when it finishes; spans recorded
+    afterwards (e.g. by a background report job) go straight to the
+    histogram.
+    """
+
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.stages = []
+        self.finished = False
+
+    @contextmanager
+    def span(self, stage):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - t0)
+
+    def record(self, stage, seconds):
+        if self.finished:
+            STAGE_SECONDS.observe(seconds, self.route, stage)
+        else:
+            self.stages.append((stage, seconds))
+
+    def server_timing(self):
+        return ", ".join(f"{stage};dur={seconds * 1000.0:.2f}" for stage, seconds in self.stages)
+
+    def finish(self, code):
+        if self.finished:
+            return
+        self.finished = True
+        REQUEST_SECONDS.observe(time.perf_counter() - self.started, self.route)
+        REQUESTS.inc(self.route, str(code))
+        for stage, seconds in self.stages:
+            STAGE_SECONDS.observe(seconds, self.route, stage)
+
+
+def start_trace(route):
+    _local.trace = Trace(route)
+    return _local.trace
+
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+def end_trace(code):
+    trace = getattr(_local, "trace", None)
+    _local.trace = None
+    if trace is not None:
+        trace.finish(code)
+    return trace
+
+
+@contextmanager
+def span(stage, trace=None):
+    """Time a stage of `trace`, by default the current thread's request
+    (a no-op outside a traced request)."""
+    trace = trace or getattr(_local, "trace", None)
+    if trace is None:
+        yield
+        return
+    with trace.span(stage):
+        yield
@@ -0,0 +1,97 @@
+# pack_dataset.py
+# Decode and resize dataset_split/ once into memory-mappable uint8 shards so
+# training runs skip JPEG decoding entirely.
+#   python pack_dataset.py [--src dataset_split] [--out dataset_packed] [--splits train val]
+# Layout per split: images-00000.npy (N, 224, 224, 3) uint8, labels-00000.npy
+# (N,) int32, ... and index.json (class names, shard list), written last so a
+# half-packed split is never picked up. Point train.py's PACKED_DIR at --out.
+import argparse, json, os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from preprocess import IMG_SIZE, load_rgb
+
+APP_ROOT = os.path.abspath(os.path.dirname(__file__))
+SRC_DIR = os.path.join(APP_ROOT, "dataset_split")
+OUT_DIR = os.path.join(APP_ROOT, "dataset_packed")
+CLASS_NAMES_PATH = os.path.join(APP_ROOT, "dog_model", "class_names.json")
+EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif")
+
+
+def load_class_names(path):
+    """Class names in index order from a class_names.json (list, or name -> index dict)."""
+    with open(path, "r") as f:
+        names = json.load(f)
+    if isinstance(names, dict):
+        names = [name for name, _ in sorted(names.items(), key=lambda item: int(item[1]))]
+    return names
+
+
+def list_split(split_dir, class_names):
+    index = {name: i for i, name in enumerate(class_names)}
+    paths, labels = [], []
+    for breed in sorted(os.listdir(split_dir)):
+        if not os.path.isdir(os.path.join(split_dir, breed)):
+            continue
+        if breed not in index:
+            print(f"⚠️  Skipping {breed}: not in class_names.json")
+            continue
+        for filename in sorted(os.listdir(os.path.join(split_dir, breed))):
+            if filename.lower().endswith(EXTENSIONS):
+                paths.append(os.path.join(split_dir, breed, filename))
+                labels.append(index[breed])
+    return paths, labels
+
+
+def decode(path, size):
+    with open(path, "rb") as f:
+        return np.asarray(load_rgb(f, size))
+
+
+def pack_split(split_dir, out_dir, class_names, size=IMG_SIZE, shard_size=1024, workers=None):
+    paths, labels = list_split(split_dir, class_names)
+    os.makedirs(out_dir, exist_ok=True)
+    index_path = os.path.join(out_dir, "index.json")
+    if os.path.exists(index_path):
+        os.remove(index_path)
+
+    shards = []
+    with ThreadPoolExecutor(workers) as pool:
+        for shard, start in enumerate(range(0, len(paths), shard_size)):
+            shard_paths = paths[start:start + shard_size]
+            images_file, labels_file = f"images-{shard:05d}.npy", f"labels-{shard:05d}.npy"
+            images = np.lib.format.open_memmap(os.path.join(out_dir, images_file), mode="w+", dtype=np.uint8,
+                                               shape=(len(shard_paths), size, size, 3))
+            for i, pixels in enumerate(pool.map(decode, shard_paths, [size] * len(shard_paths))):
+                images[i] = pixels
+            images.flush()
+            del images
+            np.save(os.path.join(out_dir, labels_file), np.array(labels[start:start + shard_size], dtype=np.int32))
+            shards.append({"images": images_file, "labels": labels_file, "count": len(shard_paths)})
+            print(f"   {images_file}: {len(shard_paths)} images")
+
+    with open(index_path, "w") as f:
+        json.dump({"img_size": size, "count": len(paths), "class_names": class_names, "shards": shards}, f, indent=2)
+    return len(paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack image folders into memory-mapped uint8 shards.")
+    parser.add_argument("--src", default=SRC_DIR)
+    parser.add_argument("--out", default=OUT_DIR)
+    parser.add_argument("--splits", nargs="+", default=["train", "val"])
+    parser.add_argument("--class-names", default=CLASS_NAMES_PATH,
+                        help="class_names.json fixing label indices (default: the served model's)")
+    parser.add_argument("--img-size", type=int, default=IMG_SIZE)
+    parser.add_argument("--shard-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    class_names = load_class_names(args.class_names)
+    for split in args.splits:
+        print(f"\n🔹 Packing {split}...")
+        count = pack_split(os.path.join(args.src, split), os.path.join(args.out, split), class_names,
+                           args.img_size, args.shard_size)
+        print(f"✅ {count} images -> {os.path.join(args.out, split)}")
+
+
+if __name__ == "__main__":
+    main()
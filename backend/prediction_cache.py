@@ -0,0 +1,97 @@
+import hashlib, json, os, threading, time
+from collections import OrderedDict
+
+
+def content_hash(data):
+    """Hex digest identifying an upload by its raw bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def model_fingerprint(model_path):
+    """Short digest identifying the served model, so cached results die with it.
+
+    For a SavedModel directory this hashes its fingerprint.pb; for a single
+    file artifact (e.g. .tflite) the file itself.
+    """
+    path = model_path
+    if os.path.isdir(model_path):
+        path = os.path.join(model_path, "fingerprint.pb")
+        if not os.path.exists(path):
+            path = os.path.join(model_path, "saved_model.pb")
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+class PredictionCache:
+    """Thread-safe LRU + TTL cache of top-k results, bounded in entries and bytes.
+
+    Entry size is the length of the value's JSON encoding, which is what the
+    cache would cost if it were ever moved out of process.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=4 * 1024 * 1024, ttl_seconds=3600):
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.ttl = float(ttl_seconds)
+        self._data = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires_at = entry
+            if self.ttl > 0 and expires_at < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        size = len(json.dumps(value))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, size, time.monotonic() + self.ttl)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
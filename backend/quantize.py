@@ -0,0 +1,87 @@
+# quantize.py
+# Build post-training quantized TFLite variants of dog_model/ and publish only
+# the ones whose accuracy on dataset_split/val stays within budget.
+#   python quantize.py [--variants int8 float16] [--max-top1-drop 0.01] [--max-top3-drop 0.01]
+# Serve a published variant with INFERENCE_BACKEND=tflite TFLITE_MODEL_PATH=dog_model_tflite/model_int8.tflite
+import argparse, glob, json, os, sys
+from backends import MODEL_DIR, SavedModelBackend, TFLiteBackend
+from evaluate import VAL_DIR, accuracy, list_val_set
+
+APP_ROOT = os.path.abspath(os.path.dirname(__file__))
+OUT_DIR = os.path.join(APP_ROOT, "dog_model_tflite")
+
+
+# -----------------------------
+# CONVERSION
+# -----------------------------
+def convert(model_dir, variant):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_saved_model(model_dir)
+    # Dynamic-range quantization: int8 weights, float activations.
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if variant == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant != "int8":
+        raise ValueError(f"unknown variant {variant!r}")
+    return converter.convert()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize dog_model with an accuracy gate.")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--val-dir", default=VAL_DIR)
+    parser.add_argument("--out-dir", default=OUT_DIR)
+    parser.add_argument("--variants", nargs="+", default=["int8", "float16"], choices=["int8", "float16"])
+    parser.add_argument("--max-top1-drop", type=float, default=0.01, help="allowed absolute top-1 drop")
+    parser.add_argument("--max-top3-drop", type=float, default=0.01, help="allowed absolute top-3 drop")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    paths, labels = list_val_set(args.val_dir)
+    if not paths:
+        raise SystemExit(f"No validation images found in {args.val_dir}")
+    if len(paths) < 200:
+        print(f"⚠️  Only {len(paths)} validation images: accuracy deltas are coarse")
+
+    print("\n🔹 Float32 SavedModel baseline...")
+    baseline = accuracy(SavedModelBackend(args.model_dir), paths, labels, args.batch_size)
+    baseline["size_bytes"] = sum(os.path.getsize(p) for p in glob.glob(os.path.join(args.model_dir, "**", "*"), recursive=True)
+                                 if os.path.isfile(p))
+    print(f"   top-1 {baseline['top1']:.4f}  top-3 {baseline['top3']:.4f}  {baseline['images_per_sec']:.1f} img/s")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    report = {"baseline": baseline, "max_top1_drop": args.max_top1_drop,
+              "max_top3_drop": args.max_top3_drop, "variants": {}}
+    refused = []
+    for variant in args.variants:
+        print(f"\n🔹 Converting {variant}...")
+        target = os.path.join(args.out_dir, f"model_{variant}.tflite")
+        candidate = target + ".candidate"
+        with open(candidate, "wb") as f:
+            f.write(convert(args.model_dir, variant))
+        metrics = accuracy(TFLiteBackend(candidate), paths, labels, args.batch_size)
+        metrics["size_bytes"] = os.path.getsize(candidate)
+        metrics["top1_drop"] = baseline["top1"] - metrics["top1"]
+        metrics["top3_drop"] = baseline["top3"] - metrics["top3"]
+        metrics["published"] = metrics["top1_drop"] <= args.max_top1_drop and metrics["top3_drop"] <= args.max_top3_drop
+        report["variants"][variant] = metrics
+        print(f"   top-1 {metrics['top1']:.4f} ({metrics['top1'] - baseline['top1']:+.4f})  "
+              f"top-3 {metrics['top3']:.4f} ({metrics['top3'] - baseline['top3']:+.4f})  "
+              f"{metrics['images_per_sec']:.1f} img/s  {metrics['size_bytes'] / 1e6:.1f} MB")
+        if metrics["published"]:
+            os.replace(candidate, target)
+            print(f"✅ Published {target}")
+        else:
+            os.remove(candidate)
+            refused.append(variant)
+            print(f"❌ Refusing to publish {variant}: accuracy drop exceeds the threshold")
+
+    with open(os.path.join(args.out_dir, "quantization_report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    if refused:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import threading, time, uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFull(Exception):
+    pass
+
+
+class ReportJobQueue:
+    """Runs report builds on a small thread pool and tracks their status.
+
+    At most `queue_limit` jobs may be waiting for a worker; `submit()` raises
+    `QueueFull` beyond that so the route can answer 429 instead of piling up
+    work. Finished jobs are forgotten after `ttl_seconds`.
+    """
+
+    def __init__(self, workers=2, queue_limit=16, ttl_seconds=3600):
+        self.workers = max(1, int(workers))
+        self.queue_limit = max(1, int(queue_limit))
+        self.ttl = float(ttl_seconds)
+        self._executor = None
+        self._jobs = {}
+        self._queued = 0
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Created on first use so no worker threads exist in a preloading master.
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="report")
+        return self._executor
+
+    def submit(self, fn, *args, job_id=None, **kwargs):
+        """Queue `fn(*args, **kwargs)`; its return value becomes the job's `result`.
+
+        Submitting a `job_id` that is already queued or running returns it
+        without scheduling the work twice.
+        """
+        with self._lock:
+            self._prune()
+            existing = self._jobs.get(job_id)
+            if existing is not None and existing["status"] in ("queued", "running"):
+                return job_id
+            if self._queued >= self.queue_limit:
+                raise QueueFull(f"{self._queued} reports already queued")
+            job_id = job_id or uuid.uuid4().hex
+            job = {"id": job_id, "status": "queued", "progress": 0.0, "result": None,
+                   "error": None, "created": time.time(), "finished": None}
+            self._jobs[job_id] = job
+            self._queued += 1
+            self._pool().submit(self._run, job, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job, fn, args, kwargs):
+        with self._lock:
+            self._queued -= 1
+            job["status"] = "running"
+            job["progress"] = 0.5
+        try:
+            result = fn(*args, **kwargs)
+            with self._lock:
+                job.update(status="done", progress=1.0, result=result, finished=time.time())
+        except Exception as e:
+            with self._lock:
+                job.update(status="failed", error=str(e), finished=time.time())
+
+    def status(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl
+        for job_id in [j["id"] for j in self._jobs.values() if j["finished"] and j["finished"] < cutoff]:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return {"workers": self.workers, "queue_limit": self.queue_limit,
+                    "queued": self._queued, "jobs": counts}
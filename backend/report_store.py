@@ -0,0 +1,134 @@
+import glob, hashlib, json, os, re, threading, time
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+REPORT_CACHE_MAX_BYTES = int(os.environ.get("REPORT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+REPORT_CACHE_MAX_AGE = float(os.environ.get("REPORT_CACHE_MAX_AGE", 7 * 24 * 3600))
+# Set to 0 on read-only / ephemeral containers: reports are then only streamed.
+REPORT_DISK_CACHE = os.environ.get("REPORT_DISK_CACHE", "1") != "0"
+CONFIDENCE_DIGITS = 4  # the report prints confidence with 4 decimals
+# A job marker older than this is assumed to belong to a worker that died.
+REPORT_JOB_MARKER_MAX_AGE = float(os.environ.get("REPORT_JOB_MARKER_MAX_AGE", 600))
+
+
+# -----------------------------
+# KEYS
+# -----------------------------
+def report_key(breed, confidence, image_hash):
+    """Content address of a report: same breed, printed confidence and upload -> same PDF."""
+    raw = f"{breed}|{round(float(confidence), CONFIDENCE_DIGITS):.{CONFIDENCE_DIGITS}f}|{image_hash or '-'}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+# What report_filename produces; the only files size/age eviction may delete.
+_REPORT_FILE_RE = re.compile(r"[a-zA-Z0-9_-]+_[0-9a-f]{24}\.pdf")
+
+
+def report_filename(breed, key):
+    safe_breed_name = re.sub(r"[^a-zA-Z0-9_-]", "_", breed)
+    return f"{safe_breed_name}_{key}.pdf"
+
+
+def find_report(report_dir, key):
+    """Filename of the stored report for `key`, or None."""
+    if not re.fullmatch(r"[0-9a-f]+", key or ""):
+        return None
+    matches = glob.glob(os.path.join(report_dir, f"*_{key}.pdf"))
+    return os.path.basename(matches[0]) if matches else None
+
+
+def save_report(path, data):
+    """Write a rendered report so readers never see a partially written file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def touch(path):
+    """Mark a cached report as recently used so size-based eviction keeps it."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+# -----------------------------
+# JOB MARKERS
+# -----------------------------
+# Async job state lives in the worker that queued the build; a small
+# `<key>.job` file next to the reports lets every worker answer status polls.
+def _marker_path(report_dir, key):
+    return os.path.join(report_dir, f"{key}.job")
+
+
+def write_job_marker(report_dir, key, status, error=None):
+    save_report(_marker_path(report_dir, key), json.dumps({"status": status, "error": error}).encode("utf-8"))
+
+
+def clear_job_marker(report_dir, key):
+    try:
+        os.remove(_marker_path(report_dir, key))
+    except OSError:
+        pass
+
+
+def read_job_marker(report_dir, key, max_age_seconds=REPORT_JOB_MARKER_MAX_AGE):
+    """{"status", "error"} recorded for `key` by any worker, or None."""
+    if not re.fullmatch(r"[0-9a-f]+", key or ""):
+        return None
+    path = _marker_path(report_dir, key)
+    try:
+        if time.time() - os.path.getmtime(path) > max_age_seconds:
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# -----------------------------
+# EVICTION
+# -----------------------------
+def prune_directory(path, max_bytes=REPORT_CACHE_MAX_BYTES, max_age_seconds=REPORT_CACHE_MAX_AGE,
+                    stale_seconds=REPORT_JOB_MARKER_MAX_AGE):
+    """Delete cached reports older than `max_age_seconds`, then least recently
+    used ones until under `max_bytes`.
+
+    Only `report_filename` entries count; other files (the shipped sample
+    reports, say) are left alone. Job markers and temp files from
+    `save_report` are in use while fresh, so they are only removed once older
+    than `stale_seconds`. Returns the number of files removed. Non-positive
+    limits disable that rule.
+    """
+    now = time.time()
+    entries = []
+    removed = 0
+    for entry in os.scandir(path):
+        try:
+            if not entry.is_file():
+                continue
+            if _REPORT_FILE_RE.fullmatch(entry.name):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+            elif entry.name.endswith((".job", ".tmp")) and now - entry.stat().st_mtime > stale_seconds:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            continue  # removed by a concurrent prune
+    entries.sort()
+
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, file_path in entries:
+        too_old = max_age_seconds > 0 and now - mtime > max_age_seconds
+        too_big = max_bytes > 0 and total > max_bytes
+        if not (too_old or too_big):
+            break
+        try:
+            os.remove(file_path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
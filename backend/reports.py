@@ -0,0 +1,132 @@
+import io, logging, os
+from datetime import datetime
+from functools import lru_cache
+from PIL import Image
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image as RLImage
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.pagesizes import legal
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+# Uploads are resampled to the size they are printed at instead of embedding
+# the original (often multi-megabyte) photo in every PDF.
+REPORT_IMAGE_DPI = float(os.environ.get("REPORT_IMAGE_DPI", 150))
+REPORT_IMAGE_QUALITY = int(os.environ.get("REPORT_IMAGE_QUALITY", 80))
+REPORT_IMAGE_MAX_HEIGHT = 350  # points
+
+
+# -----------------------------
+# IMAGE
+# -----------------------------
+def prepare_report_image(image_bytes, max_width, max_height, dpi=REPORT_IMAGE_DPI, quality=REPORT_IMAGE_QUALITY):
+    """Fit an upload into a `max_width` x `max_height` point box and re-encode it as JPEG.
+
+    Returns `(jpeg_stream, width_pt, height_pt)`. As with `RLImage._restrictSize`
+    the natural size is one point per pixel and images are only ever shrunk;
+    the pixel size is then capped at what `dpi` needs for that printed size.
+    """
+    img = Image.open(io.BytesIO(image_bytes))
+    scale = min(1.0, max_width / img.width, max_height / img.height)
+    width_pt, height_pt = img.width * scale, img.height * scale
+    px = (max(1, round(width_pt / 72.0 * dpi)), max(1, round(height_pt / 72.0 * dpi)))
+    if px[0] < img.width:
+        img.draft("RGB", px)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img = img.resize(px, Image.LANCZOS, reducing_gap=3.0)
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=quality, optimize=True)
+    out.seek(0)
+    return out, width_pt, height_pt
+
+
+# -----------------------------
+# TEMPLATES
+# -----------------------------
+# Everything that does not depend on the request is built once per process;
+# a report only adds its header text, info rows and image.
+PAGE_SIZE = legal
+PAGE_MARGIN = 40
+FRAME_WIDTH = PAGE_SIZE[0] - 2 * PAGE_MARGIN
+
+HEADER_STYLE = TableStyle([
+    ('BACKGROUND', (0,0), (-1,-1), colors.black),
+    ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+    ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+    ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+    ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0,0), (-1,0), 22)
+])
+INFO_STYLE = TableStyle([
+    ('BACKGROUND', (0,0), (0,-1), colors.HexColor("#f5f7fa")),
+    ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+    ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
+    ('FONTSIZE', (0,0), (-1,-1), 12)
+])
+DESC_STYLE = ParagraphStyle(name="Description", fontSize=11, leading=16, alignment=4, spaceBefore=10)
+SECTION_GAP = 0.3 * inch
+
+
+@lru_cache(maxsize=256)
+def _parse_description(description):
+    # Parsing the <para>/<b> markup is the expensive part of building a
+    # Paragraph; the resulting style + fragments are never mutated by layout
+    # (line breaking works on clones), so they can be shared across builds.
+    para = Paragraph(description, DESC_STYLE)
+    return para.style, para.frags
+
+
+def description_flowable(description):
+    """Fresh Paragraph for `description` that reuses the cached parse."""
+    style, frags = _parse_description(description)
+    return Paragraph(description, style, frags=frags)
+
+
+# -----------------------------
+# RENDER
+# -----------------------------
+def render_report(output, breed_display, confidence, description, image_bytes=None, timestamp=None):
+    """Build the breed report PDF into `output` (a path or a binary file object)."""
+    if timestamp is None:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    doc = SimpleDocTemplate(output, pagesize=PAGE_SIZE, leftMargin=PAGE_MARGIN, rightMargin=PAGE_MARGIN,
+                            topMargin=PAGE_MARGIN, bottomMargin=PAGE_MARGIN)
+    story = []
+
+    # Header
+    header_table = Table([[breed_display], [""]], colWidths=[FRAME_WIDTH], rowHeights=[30, 15])
+    header_table.setStyle(HEADER_STYLE)
+    story.append(header_table)
+
+    # Info table
+    info_data = [
+        [" Predicted Breed", f" {breed_display}"],
+        [" Confidence", f" {confidence:.4f}"],
+        [" Generated", f" {timestamp}"],
+    ]
+    info_table = Table(info_data, colWidths=[FRAME_WIDTH * 0.35, FRAME_WIDTH * 0.65])
+    info_table.setStyle(INFO_STYLE)
+    story.append(info_table)
+    story.append(Spacer(1, SECTION_GAP))
+
+    # Uploaded image
+    if image_bytes:
+        try:
+            stream, width, height = prepare_report_image(image_bytes, FRAME_WIDTH * 0.8, REPORT_IMAGE_MAX_HEIGHT)
+            story.append(RLImage(stream, width=width, height=height))
+            story.append(Spacer(1, SECTION_GAP))
+        except Exception as e:
+            logger.warning(f"Image insert failed: {e}")
+
+    story.append(description_flowable(description))
+
+    doc.build(story)
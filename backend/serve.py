@@ -1,10 +1,21 @@
-import os, io, json, re
-from datetime import datetime
-from flask import Flask, request, jsonify, send_from_directory, url_for
+import os, io, json, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, g, request, jsonify, send_from_directory, stream_with_context, url_for
 from flask_cors import CORS
 import numpy as np
-from PIL import Image
-import tensorflow as tf
+from batching import MicroBatcher
+from preprocess import preprocess_image
+from backends import BACKENDS, INFERENCE_BACKEND, TOP_K, backend_model_path
+from inference import InferenceClient, InferenceUnavailable, ping
+from metrics import REGISTRY, Gauge, current_trace, end_trace, span, start_trace
+from prediction_cache import PredictionCache, content_hash, model_fingerprint
+from report_jobs import QueueFull, ReportJobQueue
+from report_store import (REPORT_DISK_CACHE, clear_job_marker, find_report, prune_directory, read_job_marker,
+                          report_filename, report_key, save_report, touch, write_job_marker)
+from reports import render_report
+from startup import MODEL_LOAD, ModelLoader
+from uploads import ARCHIVE_MIMETYPES, TooManyImages, body_upload, iter_upload_images
 
 # -----------------------------
 # CONFIG
@@ -14,6 +25,25 @@ STATIC_DIR = os.path.join(APP_ROOT, "static")
 MODEL_DIR = os.path.join(APP_ROOT, "dog_model")  # saved_model.pb inside here
 LABELS_PATH = os.path.join(APP_ROOT, "labels.json")
 IMG_SIZE = 224
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 8))
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", 5))
+# "local": this process loads the model; "remote": forward to `python inference.py`
+INFERENCE_MODE = os.environ.get("INFERENCE_MODE", "local")
+INFERENCE_SOCKET = os.environ.get("INFERENCE_SOCKET", "/tmp/pawprint-inference.sock")
+PREDICTION_CACHE_ENTRIES = int(os.environ.get("PREDICTION_CACHE_ENTRIES", 1024))
+PREDICTION_CACHE_BYTES = int(os.environ.get("PREDICTION_CACHE_BYTES", 4 * 1024 * 1024))
+PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", 3600))
+PREDICT_BATCH_SIZE = int(os.environ.get("PREDICT_BATCH_SIZE", 16))
+PREDICT_BATCH_MAX_IMAGES = int(os.environ.get("PREDICT_BATCH_MAX_IMAGES", 500))
+# Uncompressed size cap per image inside an uploaded .zip/.tar
+PREDICT_BATCH_MAX_MEMBER_BYTES = int(os.environ.get("PREDICT_BATCH_MAX_MEMBER_BYTES", 32 * 1024 * 1024))
+DECODE_WORKERS = int(os.environ.get("DECODE_WORKERS", os.cpu_count() or 2))
+REPORT_WORKERS = int(os.environ.get("REPORT_WORKERS", 2))
+REPORT_QUEUE_LIMIT = int(os.environ.get("REPORT_QUEUE_LIMIT", 16))
+# "async": build on the job queue and hand back a URL; "stream": return the PDF
+# bytes in the /generate_pdf response. Clients may override per request with
+# a `delivery` form field. Without a disk cache only streaming is possible.
+REPORT_DELIVERY = os.environ.get("REPORT_DELIVERY", "async")
 
 # -----------------------------
 # APP
@@ -24,10 +54,29 @@ CORS(app)
 # -----------------------------
 # LOAD SAVEDMODEL
 # -----------------------------
-print("🔄 Loading TensorFlow SavedModel...")
-model = tf.saved_model.load(MODEL_DIR)
-infer = model.signatures["serving_default"]
-print("✅ SavedModel loaded successfully")
+if INFERENCE_MODE == "remote":
+    print(f"🔗 Forwarding inference to {INFERENCE_SOCKET}")
+    model_loader = None
+    predictor = InferenceClient(INFERENCE_SOCKET)
+else:
+    # With MODEL_LOAD=background the framework import, model load and warm-up
+    # happen on a thread; /readyz and the predict routes answer 503 until done.
+    # The backend selects the top TOP_K classes itself, so only (N, k) rows
+    # come back from the model.
+    model_loader = ModelLoader(BACKENDS[INFERENCE_BACKEND], backend_model_path(), top_k=TOP_K)
+    model_loader.start(background=MODEL_LOAD == "background")
+
+    def run_batch(batch):
+        return model_loader.run_batch(batch)
+
+    predictor = MicroBatcher(run_batch, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS)
+
+# Keyed by (upload sha256, model fingerprint) -> [[class_index, confidence], ...]
+MODEL_FINGERPRINT = model_fingerprint(backend_model_path())
+prediction_cache = PredictionCache(PREDICTION_CACHE_ENTRIES, PREDICTION_CACHE_BYTES, PREDICTION_CACHE_TTL)
+
+# PDF builds run off the request thread so /predict never waits behind ReportLab.
+report_jobs = ReportJobQueue(REPORT_WORKERS, REPORT_QUEUE_LIMIT)
 
 # -----------------------------
 # LOAD LABELS
@@ -38,6 +87,8 @@ if not os.path.exists(LABELS_PATH):
 with open(LABELS_PATH, "r") as f:
     class_indices = json.load(f)
 idx_to_class = {int(v): k for k, v in class_indices.items()}
+# Index -> breed name as a flat array, matching the model's output order.
+class_names = [idx_to_class[i] for i in range(len(idx_to_class))]
 breed_descriptions = {
     "affenpinscher": "Affenpinschers are small but fearless terriers known for their monkey-like expressions and lively personality.",
     "Afghan_hound": "The Afghan Hound is an elegant breed with long flowing hair, famous for its dignified and independent nature.",
@@ -661,20 +712,19 @@ breed_quick_tips = {
 # -----------------------------
 # HELPERS
 # -----------------------------
-def preprocess_image(file_stream):
-    img = Image.open(file_stream).convert("RGB").resize((IMG_SIZE, IMG_SIZE))
-    arr = np.array(img) / 255.0
-    arr = np.expand_dims(arr, 0).astype(np.float32)
-    return arr
-
 def expand_description(
     breed_key: str, 
     short_desc: str, 
-    breed_temperaments={}, 
-    breed_appearance={},
-    breed_care={},
-    breed_quick_tips={}
+    temperaments=None, 
+    appearances=None,
+    care_notes=None,
+    quick_tips=None
 ) -> str:
+    # Fall back to the module-level tables rather than shadowing them.
+    temperaments = breed_temperaments if temperaments is None else temperaments
+    appearances = breed_appearance if appearances is None else appearances
+    care_notes = breed_care if care_notes is None else care_notes
+    quick_tips = breed_quick_tips if quick_tips is None else quick_tips
     if not breed_key or not isinstance(breed_key, str):
         breed_key = "Unknown_Breed"
     pretty_name = breed_key.replace("_", " ").replace("-", " ").title()
@@ -691,12 +741,12 @@ def expand_description(
         + f"Historically, {pretty_name} developed traits suited to its original role—"
           "whether hunting, guarding, herding, or companionship."
     )
-    appearance_desc = breed_appearance.get(
+    appearance_desc = appearances.get(
         breed_key, 
         f"{pretty_name} typically shows characteristic physical features such as coat texture, body build, and proportions."
     )
     appearance = f"<b>Appearance ({pretty_name}):</b> {appearance_desc}"
-    temperament_desc = breed_temperaments.get(breed_key, 
+    temperament_desc = temperaments.get(breed_key, 
         "This breed shows a range of temperaments depending on lineage and environment."
     )
     temperament = (
@@ -704,13 +754,13 @@ def expand_description(
         f"{pretty_name} often displays behaviors shaped by its historical purpose, including trainability, "
         "social tendencies, and energy levels."
     )
-    care_desc = breed_care.get(
+    care_desc = care_notes.get(
         breed_key, 
         f"Grooming, exercise, and overall care requirements differ for {pretty_name}. "
         "Regular vet checkups and a balanced diet help maintain overall health."
     )
     care = f"<b>Care & Needs ({pretty_name}):</b> {care_desc}"
-    quick_desc = breed_quick_tips.get(
+    quick_desc = quick_tips.get(
         breed_key,
         "Socialize early, provide consistent training, tailor exercise needs, "
         "and monitor for breed-associated health tendencies."
@@ -727,6 +777,78 @@ def expand_description(
     )
     return combined
 
+# -----------------------------
+# PRECOMPUTED BREED TABLE
+# -----------------------------
+# Nothing below depends on the uploaded image, so it is built once at startup
+# and /predict only looks results up by class index.
+def build_breed_info(breed):
+    short_desc = breed_descriptions.get(breed, "Short description here")
+    example_file = f"breed_examples/{breed}.jpg"
+    return {
+        "breed": breed,
+        "pretty_name": breed.replace("_", " ").replace("-", " ").title(),
+        "short_description": short_desc,
+        "long_description": expand_description(breed, short_desc),
+        "example_file": example_file if os.path.exists(os.path.join(STATIC_DIR, example_file)) else None,
+    }
+
+breed_info = [build_breed_info(breed) for breed in class_names]
+breed_info_by_name = {info["breed"]: info for info in breed_info}
+
+def example_image_url(info):
+    if not info["example_file"]:
+        return None
+    return url_for("static", filename=info["example_file"], _external=True)
+
+def top_k_list(row):
+    """One image's TOP_K_DTYPE row as [[class_index, confidence], ...], best first."""
+    return [[idx, conf] for idx, conf in row.tolist()]
+
+def format_predictions(top, filename):
+    results = []
+    for idx, conf in top:
+        info = breed_info[idx]
+        results.append({
+            "breed": info["breed"],
+            "confidence": conf,
+            "example_image": example_image_url(info),
+            "short_description": info["short_description"],
+            "long_description": info["long_description"],
+            "temp_file_name": filename
+        })
+    return results
+
+def prediction_cache_key(data):
+    return f"{content_hash(data)}:{MODEL_FINGERPRINT}"
+
+_decode_pool = None
+
+_remote_ready = {"checked": 0.0, "ready": False}
+
+def model_ready():
+    if model_loader is None:
+        # The inference server only listens once warmed up, and a dead one
+        # leaves its socket file behind, so ask it; at most once a second.
+        now = time.monotonic()
+        if now - _remote_ready["checked"] > 1.0:
+            _remote_ready.update(checked=now, ready=ping(INFERENCE_SOCKET, timeout=0.5))
+        return _remote_ready["ready"]
+    return model_loader.ready
+
+def not_ready_response(error="model is still loading"):
+    response = jsonify({"error": error})
+    response.status_code = 503
+    response.headers["Retry-After"] = "5"
+    return response
+
+def decode_pool():
+    # Created lazily so a preloading gunicorn master never owns these threads.
+    global _decode_pool
+    if _decode_pool is None:
+        _decode_pool = ThreadPoolExecutor(max_workers=DECODE_WORKERS, thread_name_prefix="decode")
+    return _decode_pool
+
 # -----------------------------
 # ROUTES
 # -----------------------------
@@ -734,40 +856,192 @@ def expand_description(
 def home():
     return jsonify({"status": "ok", "message": "Backend running"}), 200
 
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    # Liveness only: the process is up and serving HTTP.
+    return jsonify({"status": "ok"}), 200
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    ready = model_ready()
+    body = {"status": "ready" if ready else "loading"}
+    if model_loader is not None:
+        body["startup"] = model_loader.status()
+        if model_loader.state == "failed":
+            body["status"] = "failed"
+    return jsonify(body), 200 if ready else 503
+
 @app.route("/predict", methods=["POST"])
 def predict():
     try:
-        if "image" not in request.files:
-            return jsonify({"error": "no image file"}), 400
-        file = request.files["image"]
-        x = preprocess_image(file.stream)
-        preds_dict = infer(tf.constant(x))
-        preds = list(preds_dict.values())[0].numpy()[0]
-        top_indices = preds.argsort()[-3:][::-1]
-        results = []
-        for idx in top_indices:
-            breed = idx_to_class[int(idx)]
-            conf = float(preds[int(idx)])
-            sample_path = os.path.join(STATIC_DIR, "breed_examples", f"{breed}.jpg")
-            sample_url = (
-                url_for("static", filename=f"breed_examples/{breed}.jpg", _external=True)
-                if os.path.exists(sample_path) else None
-            )
-            short_desc = "Short description here"
-            long_desc = expand_description(breed, short_desc)
-            results.append({
-                "breed": breed,
-                "confidence": conf,
-                "example_image": sample_url,
-                "short_description": short_desc,
-                "long_description": long_desc,
-                "temp_file_name": file.filename
-            })
-        return jsonify({"predictions": results})
+        with span("read_upload"):
+            if "image" not in request.files:
+                return jsonify({"error": "no image file"}), 400
+            file = request.files["image"]
+            data = file.read()
+        if not model_ready():
+            return not_ready_response()
+        with span("cache_lookup"):
+            cache_key = prediction_cache_key(data)
+            top = prediction_cache.get(cache_key)
+        if top is None:
+            with span("decode"):
+                x = preprocess_image(io.BytesIO(data), pooled=True)
+            # Includes time queued in the micro-batcher / inference server.
+            with span("infer"):
+                row = predictor.submit(x[0])
+            top = top_k_list(row)
+            prediction_cache.put(cache_key, top)
+        with span("describe"):
+            results = format_predictions(top, file.filename)
+        with span("serialize"):
+            return jsonify({"predictions": results})
+    except InferenceUnavailable as e:
+        app.logger.warning("Predict error: %s", e)
+        return not_ready_response(str(e))
     except Exception as e:
         app.logger.exception("Predict error")
         return jsonify({"error": str(e)}), 500
 
+# -----------------------------
+# BATCH PREDICT
+# -----------------------------
+def decode_upload(index, filename, data, trace=None):
+    item = {"index": index, "filename": filename, "key": prediction_cache_key(data)}
+    item["top"] = prediction_cache.get(item["key"])
+    if item["top"] is None:
+        try:
+            with span("decode", trace):
+                item["x"] = preprocess_image(io.BytesIO(data))[0]
+        except Exception as e:
+            item["error"] = f"could not decode image: {e}"
+    return item
+
+def finish_batch(items):
+    pending = [item for item in items if "x" in item]
+    if pending:
+        with span("infer"):
+            rows = predictor.run_batch(np.stack([item.pop("x") for item in pending]))
+        for item, row in zip(pending, rows):
+            item["top"] = top_k_list(row)
+            prediction_cache.put(item["key"], item["top"])
+    for item in items:
+        line = {"index": item["index"], "filename": item["filename"]}
+        if "error" in item:
+            line["error"] = item["error"]
+        else:
+            line["predictions"] = format_predictions(item["top"], item["filename"])
+        yield json.dumps(line) + "\n"
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    files = request.files.getlist("images") + request.files.getlist("image")
+    # An archive may also be the raw body (Content-Type: application/zip,
+    # application/x-tar...) instead of a multipart file field.
+    if not files and request.mimetype not in ARCHIVE_MIMETYPES:
+        return jsonify({"error": "no image files"}), 400
+    if not model_ready():
+        return not_ready_response()
+    if not files:
+        files = [body_upload(request.mimetype, request.stream)]
+
+    def generate():
+        # Decode runs ahead on the pool by at most two batches; each batch is
+        # inferred and streamed as soon as its images are ready.
+        uploads = enumerate(iter_upload_images(files, limit=PREDICT_BATCH_MAX_IMAGES,
+                                                     max_member_bytes=PREDICT_BATCH_MAX_MEMBER_BYTES))
+        pool = decode_pool()
+        in_flight = deque()
+        trace = current_trace()
+        truncated = False
+
+        def fill():
+            nonlocal truncated
+            while len(in_flight) < 2 * PREDICT_BATCH_SIZE:
+                try:
+                    index, (filename, data) = next(uploads)
+                except StopIteration:
+                    return
+                except TooManyImages:
+                    truncated = True
+                    return
+                in_flight.append(pool.submit(decode_upload, index, filename, data, trace))
+
+        try:
+            fill()
+            batch = []
+            while in_flight:
+                batch.append(in_flight.popleft().result())
+                fill()
+                if len(batch) == PREDICT_BATCH_SIZE or not in_flight:
+                    yield from finish_batch(batch)
+                    batch = []
+            if truncated:
+                # Tell the client the rest of its upload was not scored.
+                yield json.dumps({"error": "truncated", "limit": PREDICT_BATCH_MAX_IMAGES}) + "\n"
+        except Exception as e:
+            app.logger.exception("Batch predict error")
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@app.route("/stats", methods=["GET"])
+def stats():
+    try:
+        batching = predictor.stats()
+    except (OSError, RuntimeError) as e:
+        # Remote mode while the inference server is down or restarting
+        batching = {"error": str(e)}
+    return jsonify({
+        "batching": batching,
+        "prediction_cache": prediction_cache.stats(),
+        "report_jobs": report_jobs.stats(),
+    })
+
+# -----------------------------
+# METRICS
+# -----------------------------
+@app.before_request
+def begin_request_trace():
+    if request.endpoint not in (None, "metrics", "static"):
+        start_trace(request.endpoint)
+
+@app.after_request
+def add_server_timing(response):
+    trace = current_trace()
+    if trace is not None:
+        g.status_code = response.status_code
+        if trace.stages:
+            response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
+@app.teardown_request
+def finish_request_trace(exc=None):
+    # Runs after a streamed body has been fully sent, so the request
+    # duration covers the whole response.
+    end_trace(500 if exc is not None else g.get("status_code", 500))
+
+def cache_counters():
+    stats = prediction_cache.stats()
+    return {("hit",): stats["hits"], ("miss",): stats["misses"], ("eviction",): stats["evictions"]}
+
+REGISTRY.register(Gauge("pawprint_model_ready", "1 once the model is loaded and warmed up.",
+                        lambda: {(): int(model_ready())}))
+REGISTRY.register(Gauge("pawprint_batcher_queue_depth", "Images waiting for the micro-batcher.",
+                        lambda: {(): predictor.stats().get("queue_depth", 0)}))
+REGISTRY.register(Gauge("pawprint_batches_total", "Micro-batches run.",
+                        lambda: {(): predictor.stats().get("batches", 0)}, kind="counter"))
+REGISTRY.register(Gauge("pawprint_batched_images_total", "Images inferred through the micro-batcher.",
+                        lambda: {(): predictor.stats().get("items", 0)}, kind="counter"))
+REGISTRY.register(Gauge("pawprint_prediction_cache_total", "Prediction cache lookups and evictions.",
+                        cache_counters, ["result"], kind="counter"))
+REGISTRY.register(Gauge("pawprint_report_jobs_queued", "Report builds queued or running.",
+                        lambda: {(): report_jobs.stats()["queued"]}))
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
 @app.route("/reports/<filename>")
 def serve_report(filename):
     report_dir = os.path.join(STATIC_DIR, "reports")
@@ -779,88 +1053,122 @@ def serve_report(filename):
 @app.route("/generate_pdf", methods=["POST"])
 def generate_pdf():
     try:
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image as RLImage
-        from reportlab.lib.styles import ParagraphStyle
-        from reportlab.lib.pagesizes import legal
-        from reportlab.lib import colors
-        from reportlab.lib.units import inch
-
-        breed_raw = request.form.get("breed", "Unknown_Breed")
-        breed_display = breed_raw.replace("_", " ").replace("-", " ").title()
+        with span("read_upload"):
+            breed_raw = request.form.get("breed", "Unknown_Breed")
+            confidence = float(request.form.get("confidence", 0.0))
+            uploaded_file = request.files.get("image")
+            image_bytes = uploaded_file.read() if uploaded_file and uploaded_file.filename else None
+            delivery = request.form.get("delivery", REPORT_DELIVERY)
+        with span("describe"):
+            info = breed_info_by_name.get(breed_raw) or build_breed_info(breed_raw)
+        breed_display = info["pretty_name"]
         breed = breed_raw
-        confidence = float(request.form.get("confidence", 0.0))
-        uploaded_file = request.files.get("image")
-        short_desc = "Short description here"
-        description = expand_description(breed, short_desc)
-
-        img_path = None
-        if uploaded_file and uploaded_file.filename:
-            upload_dir = os.path.join(STATIC_DIR, "uploads")
-            os.makedirs(upload_dir, exist_ok=True)
-            safe_filename = re.sub(r"[^a-zA-Z0-9_.-]", "_", uploaded_file.filename)
-            img_path = os.path.join(upload_dir, safe_filename)
-            uploaded_file.save(img_path)
+        description = info["long_description"]
+
+        if not REPORT_DISK_CACHE:
+            delivery = "stream"
+
+        # Content-addressed: an identical request reuses the stored PDF and
+        # concurrent users never overwrite each other's report.
+        with span("hash"):
+            key = report_key(breed, confidence, content_hash(image_bytes) if image_bytes else None)
+        filename = report_filename(breed, key)
+        if delivery == "stream" and request.if_none_match.contains(key):
+            response = Response(status=304)
+            response.set_etag(key)
+            return response
 
         report_dir = os.path.join(STATIC_DIR, "reports")
-        os.makedirs(report_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        safe_breed_name = re.sub(r"[^a-zA-Z0-9_-]", "_", breed)
-        output_path = os.path.join(report_dir, f"{safe_breed_name}_report.pdf")
-
-        doc = SimpleDocTemplate(output_path, pagesize=legal, leftMargin=40, rightMargin=40, topMargin=40, bottomMargin=40)
-        FRAME_WIDTH = doc.width
-        story = []
-
-        # Header
-        header_data = [[breed_display], [""]]
-        header_table = Table(header_data, colWidths=[FRAME_WIDTH], rowHeights=[30, 15])
-        header_table.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,-1), colors.black),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0,0), (-1,0), 22)
-        ]))
-        story.append(header_table)
-
-        # Info table
-        info_data = [
-            [" Predicted Breed", f" {breed_display}"],
-            [" Confidence", f" {confidence:.4f}"],
-            [" Generated", f" {timestamp}"],
-        ]
-        info_table = Table(info_data, colWidths=[FRAME_WIDTH * 0.35, FRAME_WIDTH * 0.65])
-        info_table.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (0,-1), colors.HexColor("#f5f7fa")),
-            ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
-            ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-            ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-            ('FONTSIZE', (0,0), (-1,-1), 12)
-        ]))
-        story.append(info_table)
-        story.append(Spacer(1, 0.3 * inch))
-
-        # Uploaded image
-        if img_path:
+        output_path = os.path.join(report_dir, filename)
+        if REPORT_DISK_CACHE:
+            os.makedirs(report_dir, exist_ok=True)
+            with span("cache_lookup"):
+                cached = os.path.exists(output_path)
+            if cached:
+                touch(output_path)
+                if delivery == "stream":
+                    return send_from_directory(report_dir, filename, mimetype="application/pdf", etag=key)
+                return jsonify({
+                    "job_id": key,
+                    "status": "done",
+                    "pdf_url": url_for("serve_report", filename=filename, _external=True),
+                })
+
+        # Async builds run after the request has finished; their spans are
+        # still attributed to this route.
+        trace = current_trace()
+
+        def build():
+            buf = io.BytesIO()
+            with span("render", trace):
+                render_report(buf, breed_display, confidence, description, image_bytes=image_bytes)
+            data = buf.getvalue()
+            if REPORT_DISK_CACHE:
+                with span("save", trace):
+                    save_report(output_path, data)
+                    # The PDF is saved; failing to evict old ones must not fail this request.
+                    try:
+                        prune_directory(report_dir)
+                    except OSError:
+                        app.logger.exception("Report cache pruning failed")
+            return data
+
+        def build_file():
+            write_job_marker(report_dir, key, "running")
             try:
-                img = RLImage(img_path)
-                img._restrictSize(FRAME_WIDTH * 0.8, 350)
-                story.append(img)
-                story.append(Spacer(1, 0.3 * inch))
+                build()
             except Exception as e:
-                app.logger.warning(f"Image insert failed: {e}")
+                write_job_marker(report_dir, key, "failed", str(e))
+                raise
+            clear_job_marker(report_dir, key)
+            return filename
 
-        desc_style = ParagraphStyle(name="Description", fontSize=11, leading=16, alignment=4, spaceBefore=10)
-        story.append(Paragraph(description, desc_style))
+        if delivery == "stream":
+            response = Response(build(), mimetype="application/pdf")
+            response.set_etag(key)
+            response.headers["Content-Disposition"] = f'inline; filename="{filename}"'
+            return response
 
-        doc.build(story)
-        pdf_url = url_for("serve_report", filename=f"{safe_breed_name}_report.pdf", _external=True)
-        return jsonify({"pdf_url": pdf_url})
+        # Written before queueing so a poll on another worker never misses it.
+        write_job_marker(report_dir, key, "queued")
+        try:
+            job_id = report_jobs.submit(build_file, job_id=key)
+        except QueueFull:
+            clear_job_marker(report_dir, key)
+            return jsonify({"error": "report queue is full, retry shortly"}), 429
+        with span("serialize"):
+            return jsonify({
+                "job_id": job_id,
+                "status_url": url_for("report_status", job_id=job_id, _external=True),
+            }), 202
     except Exception as e:
         app.logger.exception("Generate PDF error")
         return jsonify({"error": str(e)}), 500
 
+@app.route("/reports/status/<job_id>", methods=["GET"])
+def report_status(job_id):
+    job = report_jobs.status(job_id)
+    if job is None:
+        # Job ids are report keys, so a report built by another worker (or
+        # before a restart) is still found on disk, and one still being
+        # built elsewhere has a job marker.
+        report_dir = os.path.join(STATIC_DIR, "reports")
+        filename = find_report(report_dir, job_id)
+        if filename is not None:
+            job = {"status": "done", "progress": 1.0, "result": filename}
+        else:
+            marker = read_job_marker(report_dir, job_id)
+            if marker is None:
+                return jsonify({"error": "unknown job"}), 404
+            progress = {"queued": 0.0, "running": 0.5}.get(marker["status"], 1.0)
+            job = {"status": marker["status"], "progress": progress, "error": marker.get("error")}
+    body = {"job_id": job_id, "status": job["status"], "progress": job["progress"]}
+    if job["status"] == "done":
+        body["pdf_url"] = url_for("serve_report", filename=job["result"], _external=True)
+    elif job["status"] == "failed":
+        body["error"] = job["error"]
+    return jsonify(body)
+
 # -----------------------------
 # RUN
 # -----------------------------
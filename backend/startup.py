@@ -0,0 +1,121 @@
+import logging, os, threading, time
+from functools import partial
+import numpy as np
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+# "eager": load and warm up before serving; "background": start serving at
+# once and load on a thread while /readyz answers 503.
+MODEL_LOAD = os.environ.get("MODEL_LOAD", "eager")
+# Batch sizes pushed through the model before it is reported ready; cover the
+# sizes the micro-batcher and /predict/batch actually produce.
+WARMUP_BATCH_SIZES = [int(b) for b in os.environ.get("WARMUP_BATCH_SIZES", "1,8").split(",") if b.strip()]
+IMG_SHAPE = (224, 224, 3)
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up(run_batch, batch_sizes):
+    """Push zero batches of each size through `run_batch` so graph tracing,
+    kernel selection and tensor allocation happen before real traffic.
+
+    Returns `{batch_size: seconds}`.
+    """
+    timings = {}
+    for batch_size in batch_sizes:
+        t0 = time.perf_counter()
+        run_batch(np.zeros((batch_size,) + IMG_SHAPE, dtype=np.float32))
+        timings[batch_size] = time.perf_counter() - t0
+    return timings
+
+
+class ModelLoader:
+    """Loads an inference backend (optionally on a background thread) and
+    records how long each startup phase took.
+
+    `state` moves pending -> loading -> ready (or failed); `backend` and
+    `run_batch` are set once the model is loaded and warmed. With `top_k`,
+    `run_batch` returns the backend's top-k rows instead of probabilities and
+    that is the path warmed up.
+    """
+
+    def __init__(self, backend_cls, path, warmup_batch_sizes=WARMUP_BATCH_SIZES, top_k=None):
+        self.backend_cls = backend_cls
+        self.path = path
+        self.warmup_batch_sizes = list(warmup_batch_sizes)
+        self.top_k = top_k
+        self.state = "pending"
+        self.error = None
+        self.backend = None
+        self.run_batch = None
+        self.phases = {}
+        self._ready = threading.Event()
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def start(self, background=False):
+        """Load now, or on a daemon thread so the caller (e.g. a gunicorn
+        worker) can start accepting connections straight away. A background
+        failure is recorded in `state`/`error` rather than raised.
+        """
+        if background:
+            threading.Thread(target=self._load_quietly, name="model-loader", daemon=True).start()
+        else:
+            self.load()
+        return self
+
+    def _load_quietly(self):
+        try:
+            self.load()
+        except Exception:
+            pass
+
+    def load(self):
+        self.state = "loading"
+        try:
+            t0 = time.perf_counter()
+            self.backend_cls.import_runtime()
+            self.phases["import_runtime"] = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            backend = self.backend_cls(self.path)
+            self.phases["load_model"] = time.perf_counter() - t0
+
+            run_batch = backend if self.top_k is None else partial(backend.top_k, k=self.top_k)
+            t0 = time.perf_counter()
+            warmup = warm_up(run_batch, self.warmup_batch_sizes)
+            self.phases["warmup"] = time.perf_counter() - t0
+            self.phases["warmup_by_batch_size"] = warmup
+
+            self.backend = backend
+            self.run_batch = run_batch
+            self.state = "ready"
+            self._ready.set()
+            logger.info("Model ready: %s", self.describe())
+            print(f"✅ Model ready ({self.describe()})")
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            logger.exception("Model loading failed")
+            raise
+
+    def describe(self):
+        parts = [f"{name} {seconds:.2f}s" for name, seconds in self.phases.items() if isinstance(seconds, float)]
+        warmup = self.phases.get("warmup_by_batch_size", {})
+        if warmup:
+            parts.append("warmup per batch size " + ", ".join(f"{b}: {s:.2f}s" for b, s in warmup.items()))
+        return ", ".join(parts)
+
+    def status(self):
+        return {
+            "state": self.state,
+            "error": self.error,
+            "phases": {k: v for k, v in self.phases.items() if k != "warmup_by_batch_size"},
+            "warmup_by_batch_size": {str(k): v for k, v in self.phases.get("warmup_by_batch_size", {}).items()},
+        }
@@ -1,10 +1,13 @@
 # train.py
 import tensorflow as tf
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from tensorflow.keras.layers import Dense, Dropout, GlobalAveragePooling2D
 from tensorflow.keras.models import Model
 from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau, ModelCheckpoint
-import json, os
+import argparse, json, math, os
+import compression
+from feature_cache import ensure_cache, feature_dataset, load_split as load_features
+from train_data import make_dataset, make_packed_dataset
+from train_runtime import STRATEGIES, DataWaitProbe, ThroughputLogger, configure_runtime
 
 # --- SETTINGS ---
 IMG_SIZE = 224
@@ -13,71 +16,116 @@ EPOCHS_HEAD = 5
 EPOCHS_FINE = 10
 TRAIN_DIR = "dataset_split/train"
 VAL_DIR   = "dataset_split/val"
-
-# --- DATA AUGMENTATION ---
-train_gen = ImageDataGenerator(
-    preprocessing_function=tf.keras.applications.efficientnet.preprocess_input,
-    rotation_range=20,
-    width_shift_range=0.1,
-    height_shift_range=0.1,
-    shear_range=0.1,
-    zoom_range=0.1,
-    horizontal_flip=True,
-    fill_mode="nearest"
-).flow_from_directory(
-    TRAIN_DIR,
-    target_size=(IMG_SIZE, IMG_SIZE),
-    batch_size=BATCH_SIZE,
-    class_mode="categorical"
-)
-
-val_gen = ImageDataGenerator(
-    preprocessing_function=tf.keras.applications.efficientnet.preprocess_input
-).flow_from_directory(
-    VAL_DIR,
-    target_size=(IMG_SIZE, IMG_SIZE),
-    batch_size=BATCH_SIZE,
-    class_mode="categorical",
-    shuffle=False
-)
+# Decoded 224x224 images are cached after the first epoch: "memory", a file
+# prefix for an on-disk cache (e.g. "cache/train"), or None.
+TRAIN_CACHE = "memory"
+VAL_CACHE = "memory"
+# Shards written by pack_dataset.py (e.g. "dataset_packed"); when set, images
+# are memory-mapped from there instead of decoded from TRAIN_DIR / VAL_DIR,
+# and label indices follow the class_names.json they were packed with.
+PACKED_DIR = None
+# Train the head on pooled backbone features cached in this directory (e.g.
+# "features") instead of running the frozen backbone every epoch; the cache
+# holds the training set once plain plus FEATURE_AUG_COPIES augmented passes.
+FEATURE_CACHE = None
+FEATURE_AUG_COPIES = 2
+
+# --- RUNTIME FLAGS ---
+parser = argparse.ArgumentParser(description="Train the dog breed classifier.")
+parser.add_argument("--intra-op-threads", type=int, default=0, help="threads per op (0 = TensorFlow default)")
+parser.add_argument("--inter-op-threads", type=int, default=0, help="ops run concurrently (0 = TensorFlow default)")
+parser.add_argument("--mixed-precision", choices=["off", "bfloat16", "auto"], default="off",
+                    help="auto enables bfloat16 when the CPU has AVX512_BF16/AMX")
+parser.add_argument("--strategy", choices=STRATEGIES, default="default", help="tf.distribute strategy")
+# Compression of the unfrozen layers and head during fine-tuning; needs
+# tensorflow-model-optimization (see compression.py).
+parser.add_argument("--prune-sparsity", type=float, default=0.0,
+                    help="final fraction of zeroed weights, reached over the fine-tune epochs (0 = off)")
+parser.add_argument("--cluster-count", type=int, default=0, help="weight clusters per kernel (0 = off)")
+parser.add_argument("--cluster-epochs", type=int, default=2, help="extra fine-tune epochs with clustering on")
+args = parser.parse_args()
+strategy = configure_runtime(args.intra_op_threads, args.inter_op_threads, args.mixed_precision, args.strategy)
+
+# --- INPUT PIPELINE ---
+def load_split(split, training=False, class_names=None, cache=True):
+    if PACKED_DIR:
+        return make_packed_dataset(os.path.join(PACKED_DIR, split), batch_size=BATCH_SIZE, training=training)
+    directory, split_cache = (TRAIN_DIR, TRAIN_CACHE) if split == "train" else (VAL_DIR, VAL_CACHE)
+    return make_dataset(directory, batch_size=BATCH_SIZE, training=training,
+                        cache=split_cache if cache else None, class_names=class_names, img_size=IMG_SIZE)
+
+train_ds, class_names, num_train = load_split("train", training=True)
+# Validation uses the training class order so label indices line up.
+val_ds, _, num_val = load_split("val", class_names=class_names)
+# Lets the throughput log tell input-bound epochs from compute-bound ones.
+probe = DataWaitProbe()
+train_ds = probe.attach(train_ds)
+print(f"Found {num_train} training and {num_val} validation images in {len(class_names)} classes.")
 
 # --- BASE MODEL ---
-base_model = tf.keras.applications.EfficientNetB0(
-    include_top=False,
-    weights="imagenet",
-    input_shape=(IMG_SIZE, IMG_SIZE, 3)
-)
-base_model.trainable = False  # freeze for head training
-
-# --- CUSTOM CLASSIFIER ---
-x = base_model.output
-x = GlobalAveragePooling2D()(x)
-x = Dropout(0.4)(x)
-preds = Dense(train_gen.num_classes, activation="softmax")(x)
-
-model = Model(inputs=base_model.input, outputs=preds)
-
-model.compile(
-    optimizer="adam",
-    loss="categorical_crossentropy",
-    metrics=["accuracy"]
-)
+with strategy.scope():
+    base_model = tf.keras.applications.EfficientNetB0(
+        include_top=False,
+        weights="imagenet",
+        input_shape=(IMG_SIZE, IMG_SIZE, 3)
+    )
+    base_model.trainable = False  # freeze for head training
+
+    # --- CUSTOM CLASSIFIER ---
+    x = base_model.output
+    pooled = GlobalAveragePooling2D()(x)
+    # Kept as objects so the cached-feature head below shares their weights.
+    dropout = Dropout(0.4)
+    # float32 even under mixed precision: softmax is unstable in bfloat16.
+    classifier = Dense(len(class_names), activation="softmax", dtype="float32")
+    preds = classifier(dropout(pooled))
+
+    model = Model(inputs=base_model.input, outputs=preds)
+
+    model.compile(
+        optimizer="adam",
+        loss="categorical_crossentropy",
+        metrics=["accuracy"]
+    )
 
 # --- CALLBACKS ---
-callbacks = [
-    EarlyStopping(monitor="val_loss", patience=4, restore_best_weights=True),
-    ReduceLROnPlateau(monitor="val_loss", factor=0.3, patience=2, verbose=1),
-    ModelCheckpoint("best_model.keras", monitor="val_accuracy", save_best_only=True, verbose=1)
-]
+early_stop = EarlyStopping(monitor="val_loss", patience=4, restore_best_weights=True)
+reduce_lr = ReduceLROnPlateau(monitor="val_loss", factor=0.3, patience=2, verbose=1)
+checkpoint = ModelCheckpoint("best_model.keras", monitor="val_accuracy", save_best_only=True, verbose=1)
+throughput = ThroughputLogger(BATCH_SIZE, probe)
+callbacks = [early_stop, reduce_lr, checkpoint, throughput]
 
 # --- TRAIN HEAD ---
-print("\n🔹 Training classifier head only...")
-history_head = model.fit(
-    train_gen,
-    validation_data=val_gen,
-    epochs=EPOCHS_HEAD,
-    callbacks=callbacks
-)
+if FEATURE_CACHE:
+    print("\n🔹 Training classifier head on cached backbone features...")
+    meta = {"backbone": "EfficientNetB0/imagenet", "img_size": IMG_SIZE, "class_names": class_names,
+            "source": PACKED_DIR or [TRAIN_DIR, VAL_DIR], "num_train": num_train, "num_val": num_val}
+    ensure_cache(
+        FEATURE_CACHE, Model(base_model.input, pooled), meta,
+        plain_train=load_split("train", class_names=class_names, cache=False),
+        val=val_ds,
+        augmented_train=load_split("train", training=True, class_names=class_names, cache=False),
+        copies=FEATURE_AUG_COPIES,
+    )
+    with strategy.scope():
+        features_in = tf.keras.Input((pooled.shape[-1],))
+        head = Model(features_in, classifier(dropout(features_in)))
+        head.compile(optimizer="adam", loss="categorical_crossentropy", metrics=["accuracy"])
+    history_head = head.fit(
+        feature_dataset(*load_features(FEATURE_CACHE, "train"), len(class_names), BATCH_SIZE, training=True),
+        validation_data=feature_dataset(*load_features(FEATURE_CACHE, "val"), len(class_names), BATCH_SIZE),
+        epochs=EPOCHS_HEAD,
+        # The checkpoint would only capture the head.
+        callbacks=[early_stop, reduce_lr, ThroughputLogger(BATCH_SIZE)]
+    )
+else:
+    print("\n🔹 Training classifier head only...")
+    history_head = model.fit(
+        train_ds,
+        validation_data=val_ds,
+        epochs=EPOCHS_HEAD,
+        callbacks=callbacks
+    )
 
 # --- FINE-TUNING ---
 print("\n🔹 Fine-tuning EfficientNet...")
@@ -88,6 +136,24 @@ base_model.trainable = True
 for layer in base_model.layers[:-20]:
     layer.trainable = False
 
+compress = args.prune_sparsity > 0 or args.cluster_count > 0
+if compress:
+    targets = compression.target_layers(model, base_model, num_layers=20)
+    print(f"   compressing {len(targets)} layers: pruning to {args.prune_sparsity:.0%}, "
+          f"{args.cluster_count or 'no'} clusters")
+    # Restoring the "best" epoch could roll back to a less sparse model, and
+    # the checkpoint would save the wrappers: keep only LR decay and logging.
+    fine_callbacks = [reduce_lr, throughput]
+else:
+    fine_callbacks = callbacks
+if args.prune_sparsity > 0:
+    with strategy.scope():
+        # Reach the target sparsity a little before the end so the last
+        # epochs recover accuracy at the final mask.
+        end_step = max(1, math.ceil(num_train / BATCH_SIZE) * max(1, EPOCHS_FINE - 2))
+        model = compression.apply_pruning(model, targets, args.prune_sparsity, end_step)
+    fine_callbacks = fine_callbacks + compression.pruning_callbacks()
+
 model.compile(
     optimizer=tf.keras.optimizers.Adam(1e-5),
     loss="categorical_crossentropy",
@@ -95,20 +161,38 @@ model.compile(
 )
 
 history_fine = model.fit(
-    train_gen,
-    validation_data=val_gen,
+    train_ds,
+    validation_data=val_ds,
     epochs=EPOCHS_FINE,
-    callbacks=callbacks
+    callbacks=fine_callbacks
 )
 
+if args.prune_sparsity > 0:
+    model = compression.strip_pruning(model)
+if args.cluster_count > 0:
+    print(f"\n🔹 Clustering weights ({args.cluster_count} per kernel)...")
+    with strategy.scope():
+        model = compression.apply_clustering(model, targets, args.cluster_count,
+                                             preserve_sparsity=args.prune_sparsity > 0)
+    model.compile(optimizer=tf.keras.optimizers.Adam(1e-5), loss="categorical_crossentropy", metrics=["accuracy"])
+    # No pruning step callback: the model was stripped above.
+    model.fit(train_ds, validation_data=val_ds, epochs=args.cluster_epochs, callbacks=[reduce_lr, throughput])
+    model = compression.strip_clustering(model)
+
 # --- SAVE MODEL (SavedModel format) ---
-save_path = "dog_model"
+# A compressed run leaves the served dense dog_model/ in place, so
+# bench_compression.py can compare the two without retraining.
+save_path = "dog_model_compressed" if compress else "dog_model"
 model.save(save_path)
 
-# --- SAVE LABELS INSIDE dog_model FOLDER ---
+# --- SAVE LABELS INSIDE THE MODEL FOLDER ---
 with open(os.path.join(save_path, "class_names.json"), "w") as f:
-    json.dump(train_gen.class_indices, f)
+    json.dump({name: i for i, name in enumerate(class_names)}, f)
+
+if compress:
+    print(f"Compressed archive: {compression.write_archive(save_path)}")
+    print(f"Compare with: python bench_compression.py; serve with SAVEDMODEL_PATH={save_path}")
 
 print("\nTraining complete!")
-print("Model saved as: dog_model/")
-print("Labels saved as: dog_model/class_names.json")
+print(f"Model saved as: {save_path}/")
+print(f"Labels saved as: {save_path}/class_names.json")
@@ -0,0 +1,212 @@
+# train_data.py
+# tf.data input pipelines for train.py: parallel decode/resize, a cache of
+# decoded 224x224 uint8 images, batched augmentation and prefetch; or
+# memory-mapped shards from pack_dataset.py, which skip decoding altogether.
+import json, math, os
+import numpy as np
+import tensorflow as tf
+
+AUTOTUNE = tf.data.AUTOTUNE
+IMG_SIZE = 224
+# What tf.io.decode_image understands; .webp would need PIL.
+EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif")
+
+
+def list_image_dir(directory, class_names=None):
+    """(paths, labels, class_names) for `directory`/<class>/<image>.
+
+    Classes are the sorted subdirectory names, the same order
+    `flow_from_directory` used, unless `class_names` pins the order (e.g. to
+    give the validation set the training set's indices).
+    """
+    if class_names is None:
+        class_names = sorted(d for d in os.listdir(directory) if os.path.isdir(os.path.join(directory, d)))
+    paths, labels = [], []
+    for index, name in enumerate(class_names):
+        class_dir = os.path.join(directory, name)
+        if not os.path.isdir(class_dir):
+            continue
+        for filename in sorted(os.listdir(class_dir)):
+            if filename.lower().endswith(EXTENSIONS):
+                paths.append(os.path.join(class_dir, filename))
+                labels.append(index)
+    return paths, labels, list(class_names)
+
+
+def decode_resize(path, label, img_size=IMG_SIZE):
+    image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+    image = tf.image.resize(image, (img_size, img_size), antialias=True)
+    # Cached as uint8: a quarter of the float32 footprint.
+    return tf.cast(tf.round(image), tf.uint8), label
+
+
+class RandomAffine(tf.keras.layers.Layer):
+    """ImageDataGenerator's random affine augmentation as one batched op.
+
+    Flip, rotation (degrees), shift (fraction of size), shear (degrees) and
+    per-axis zoom are composed into a single projective transform per image,
+    so the batch is resampled once instead of once per Keras Random* layer.
+    """
+
+    def __init__(self, rotation=20, shift=0.1, shear=0.1, zoom=0.1, flip=True, fill_mode="nearest", **kwargs):
+        super().__init__(**kwargs)
+        self.rotation = rotation
+        self.shift = shift
+        self.shear = shear
+        self.zoom = zoom
+        self.flip = flip
+        self.fill_mode = fill_mode
+
+    def call(self, images, training=True):
+        if not training:
+            return images
+        shape = tf.shape(images)
+        n = shape[0]
+        h = tf.cast(shape[1], tf.float32)
+        w = tf.cast(shape[2], tf.float32)
+
+        def uniform(bound):
+            return tf.random.uniform([n], -bound, bound)
+
+        theta = uniform(self.rotation * math.pi / 180.0)
+        shear = uniform(self.shear * math.pi / 180.0)
+        zx = 1.0 + uniform(self.zoom)
+        zy = 1.0 + uniform(self.zoom)
+        tx = uniform(self.shift) * w
+        ty = uniform(self.shift) * h
+        flip = tf.where(tf.random.uniform([n]) < 0.5, -1.0, 1.0) if self.flip else tf.ones([n])
+
+        # Output -> input mapping: rotation . shear . zoom . flip about the centre.
+        cos, sin = tf.cos(theta), tf.sin(theta)
+        a00 = cos * zx * flip
+        a01 = (-cos * tf.sin(shear) - sin * tf.cos(shear)) * zy
+        a10 = sin * zx * flip
+        a11 = (-sin * tf.sin(shear) + cos * tf.cos(shear)) * zy
+        cx, cy = (w - 1.0) / 2.0, (h - 1.0) / 2.0
+        a02 = cx - a00 * cx - a01 * cy + tx
+        a12 = cy - a10 * cx - a11 * cy + ty
+        zeros = tf.zeros([n])
+        transforms = tf.stack([a00, a01, a02, a10, a11, a12, zeros, zeros], axis=1)
+        return tf.raw_ops.ImageProjectiveTransformV3(
+            images=images, transforms=transforms, output_shape=shape[1:3], fill_value=0.0,
+            interpolation="BILINEAR", fill_mode=self.fill_mode.upper(),
+        )
+
+    def get_config(self):
+        config = super().get_config()
+        config.update(rotation=self.rotation, shift=self.shift, shear=self.shear, zoom=self.zoom,
+                      flip=self.flip, fill_mode=self.fill_mode)
+        return config
+
+
+def augmentation_layers():
+    """The old ImageDataGenerator settings: rotation 20°, shift 0.1, shear 0.1°,
+    zoom 0.1, horizontal flip, nearest fill. Pinned to float32 so a global
+    mixed-precision policy does not reach into the input pipeline."""
+    return RandomAffine(rotation=20, shift=0.1, shear=0.1, zoom=0.1, flip=True, fill_mode="nearest",
+                        name="augmentation", dtype="float32")
+
+
+def model_inputs(num_classes, training, augment=None):
+    """Map fn turning a batch of (uint8 images, labels) into model inputs.
+
+    Images come out as float32 in [0, 255], which is what
+    efficientnet.preprocess_input (a passthrough) expects.
+    """
+    augment = augment or (augmentation_layers() if training else None)
+
+    def to_model_inputs(images, labels):
+        images = tf.cast(images, tf.float32)
+        if augment is not None:
+            images = augment(images, training=True)
+        images = tf.keras.applications.efficientnet.preprocess_input(images)
+        return images, tf.one_hot(labels, num_classes)
+
+    return to_model_inputs
+
+
+def finish(dataset, num_classes, batch_size, training, augment=None):
+    """Shuffle/batch/augment/prefetch a dataset of (uint8 image, label) pairs."""
+    if training:
+        dataset = dataset.shuffle(2048, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size, num_parallel_calls=AUTOTUNE)
+    return dataset.map(model_inputs(num_classes, training, augment), num_parallel_calls=AUTOTUNE).prefetch(AUTOTUNE)
+
+
+def make_dataset(directory, batch_size=32, training=False, cache="memory", class_names=None, img_size=IMG_SIZE):
+    """Batched (images, one-hot labels) from an image directory.
+
+    `cache` is "memory", a file prefix for an on-disk cache, or None. Decoding
+    only happens in the first epoch when caching.
+
+    Returns (dataset, class_names, number of images).
+    """
+    paths, labels, class_names = list_image_dir(directory, class_names)
+    dataset = tf.data.Dataset.from_tensor_slices((paths, tf.constant(labels, tf.int32)))
+    if training:
+        # Files are listed class by class; shuffle that order once so the
+        # post-cache shuffle buffer sees every class.
+        dataset = dataset.shuffle(len(paths), seed=0, reshuffle_each_iteration=False)
+    dataset = dataset.map(lambda p, l: decode_resize(p, l, img_size), num_parallel_calls=AUTOTUNE)
+    if cache == "memory":
+        dataset = dataset.cache()
+    elif cache:
+        os.makedirs(os.path.dirname(os.path.abspath(cache)), exist_ok=True)
+        dataset = dataset.cache(cache)
+    return finish(dataset, len(class_names), batch_size, training), class_names, len(paths)
+
+
+# -----------------------------
+# PACKED SHARDS (pack_dataset.py)
+# -----------------------------
+class PackedImages:
+    """A split written by pack_dataset.py, memory-mapped shard by shard.
+
+    Nothing is read up front; `gather` pulls just the requested rows out of
+    the page cache.
+    """
+
+    def __init__(self, split_dir):
+        with open(os.path.join(split_dir, "index.json"), "r") as f:
+            index = json.load(f)
+        self.class_names = index["class_names"]
+        self.img_size = index["img_size"]
+        self.images = [np.load(os.path.join(split_dir, s["images"]), mmap_mode="r") for s in index["shards"]]
+        self.labels = np.concatenate([np.load(os.path.join(split_dir, s["labels"])) for s in index["shards"]]
+                                     or [np.zeros(0, np.int32)])
+        self.offsets = np.cumsum([0] + [s["count"] for s in index["shards"]])
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def gather(self, indices):
+        indices = np.sort(indices)  # sequential reads; labels follow the same order
+        shard_of = np.searchsorted(self.offsets, indices, side="right") - 1
+        images = np.empty((len(indices), self.img_size, self.img_size, 3), dtype=np.uint8)
+        for shard in np.unique(shard_of):
+            rows = shard_of == shard
+            images[rows] = self.images[shard][indices[rows] - self.offsets[shard]]
+        return images, self.labels[indices]
+
+
+def make_packed_dataset(split_dir, batch_size=32, training=False):
+    """Like `make_dataset`, but batches are read from memory-mapped shards.
+
+    Returns (dataset, class_names, number of images).
+    """
+    packed = PackedImages(split_dir)
+    size = packed.img_size
+    dataset = tf.data.Dataset.range(len(packed))
+    if training:
+        dataset = dataset.shuffle(len(packed), reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+
+    def read(indices):
+        images, labels = tf.numpy_function(packed.gather, [indices], (tf.uint8, tf.int32))
+        images.set_shape([None, size, size, 3])
+        labels.set_shape([None])
+        return images, labels
+
+    dataset = dataset.map(read, num_parallel_calls=AUTOTUNE)
+    dataset = dataset.map(model_inputs(len(packed.class_names), training), num_parallel_calls=AUTOTUNE)
+    return dataset.prefetch(AUTOTUNE), packed.class_names, len(packed)
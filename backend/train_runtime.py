@@ -0,0 +1,108 @@
+# train_runtime.py
+# Hardware-facing knobs for train.py: TF thread pools, bfloat16 mixed
+# precision, the tf.distribute strategy, and per-epoch throughput logging.
+import time
+import tensorflow as tf
+
+STRATEGIES = ["default", "mirrored", "multi-worker"]
+
+
+def cpu_supports_bfloat16():
+    """True on CPUs with native bf16 arithmetic (AVX512_BF16 or AMX)."""
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+def configure_runtime(intra_op_threads=0, inter_op_threads=0, mixed_precision="off", strategy="default"):
+    """Apply thread and precision settings; must run before TensorFlow executes
+    any op. Returns the distribution strategy to build the model under.
+    """
+    if intra_op_threads:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    if inter_op_threads:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+    if mixed_precision == "auto":
+        mixed_precision = "bfloat16" if cpu_supports_bfloat16() else "off"
+        print(f"Mixed precision: {mixed_precision} (auto-detected)")
+    if mixed_precision == "bfloat16":
+        # Layers compute in bfloat16 and keep float32 variables; the softmax
+        # head is built with dtype="float32" so probabilities stay float32.
+        tf.keras.mixed_precision.set_global_policy("mixed_bfloat16")
+
+    if strategy == "mirrored":
+        return tf.distribute.MirroredStrategy()
+    if strategy == "multi-worker":
+        # Cluster layout comes from the TF_CONFIG environment variable.
+        return tf.distribute.MultiWorkerMirroredStrategy()
+    return tf.distribute.get_strategy()
+
+
+class DataWaitProbe:
+    """Stamps each batch with the time it leaves the input pipeline.
+
+    Keras fetches the next batch inside the compiled train step, so the gap
+    between batch callbacks says nothing about input stalls; comparing the
+    step's start with the moment its batch arrived does.
+    """
+
+    def __init__(self):
+        self.arrived = tf.Variable(0.0, dtype=tf.float64, trainable=False)
+
+    def attach(self, dataset):
+        def stamp(*batch):
+            with tf.control_dependencies([self.arrived.assign(tf.timestamp())]):
+                return tuple(tf.identity(t) for t in batch)
+
+        return dataset.map(stamp)
+
+
+class ThroughputLogger(tf.keras.callbacks.Callback):
+    """Logs images/sec, mean step time and input wait per epoch.
+
+    The numbers are also added to the epoch logs (and so to `History`).
+    Without a `probe` the data wait is not reported.
+    """
+
+    def __init__(self, batch_size, probe=None):
+        super().__init__()
+        self.batch_size = batch_size
+        self.probe = probe
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._steps = 0
+        self._step_seconds = 0.0
+        self._wait_seconds = 0.0
+        self._epoch_start = time.time()
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self._step_start = time.time()
+
+    def on_train_batch_end(self, batch, logs=None):
+        now = time.time()
+        self._steps += 1
+        self._step_seconds += now - self._step_start
+        if self.probe is not None:
+            self._wait_seconds += min(max(0.0, float(self.probe.arrived.numpy()) - self._step_start),
+                                      now - self._step_start)
+
+    def on_epoch_end(self, epoch, logs=None):
+        if not self._steps:
+            return
+        elapsed = time.time() - self._epoch_start
+        stats = {
+            "images_per_sec": self._steps * self.batch_size / elapsed,
+            "step_ms": 1000.0 * self._step_seconds / self._steps,
+        }
+        line = f"⏱️  epoch {epoch + 1}: {stats['images_per_sec']:.1f} img/s, step {stats['step_ms']:.1f} ms"
+        if self.probe is not None:
+            stats["data_wait_ms"] = 1000.0 * self._wait_seconds / self._steps
+            stats["data_wait_fraction"] = self._wait_seconds / self._step_seconds if self._step_seconds else 0.0
+            line += f", data wait {stats['data_wait_ms']:.1f} ms ({100 * stats['data_wait_fraction']:.0f}%)"
+        print(line)
+        if logs is not None:
+            logs.update(stats)
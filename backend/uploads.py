@@ -0,0 +1,96 @@
+import os, shutil, tarfile, tempfile, zipfile
+from werkzeug.datastructures import FileStorage
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif")
+ZIP_EXTENSIONS = (".zip",)
+TAR_EXTENSIONS = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+# Raw (non-multipart) request bodies accepted as archives, with the file name
+# that picks their reader.
+ARCHIVE_MIMETYPES = {
+    "application/zip": "upload.zip",
+    "application/x-zip-compressed": "upload.zip",
+    "application/x-tar": "upload.tar",
+    "application/gzip": "upload.tar.gz",
+    "application/x-gzip": "upload.tar.gz",
+    "application/x-bzip2": "upload.tar.bz2",
+    "application/x-xz": "upload.tar.xz",
+}
+# Raw zip bodies are spooled (zipfile seeks to the central directory at the
+# end); this much stays in memory before spilling to disk.
+ZIP_SPOOL_BYTES = 8 * 1024 * 1024
+
+
+class ArchiveMemberTooLarge(ValueError):
+    pass
+
+
+class TooManyImages(ValueError):
+    def __init__(self, limit):
+        super().__init__(f"more than {limit} images")
+        self.limit = limit
+
+
+def _is_image(name):
+    base = os.path.basename(name)
+    return base.lower().endswith(IMAGE_EXTENSIONS) and not base.startswith(".")
+
+
+def _check_size(name, size, max_member_bytes):
+    # Checked against the header before anything is decompressed: a few KB of
+    # archive can declare gigabytes of output.
+    if max_member_bytes is not None and size > max_member_bytes:
+        raise ArchiveMemberTooLarge(f"{name}: {size} bytes uncompressed, limit is {max_member_bytes}")
+
+
+def body_upload(mimetype, stream):
+    """Wrap a raw archive request body as an upload for `iter_upload_images`,
+    or return None if `mimetype` is not an archive type."""
+    filename = ARCHIVE_MIMETYPES.get(mimetype)
+    if filename is None:
+        return None
+    if filename.endswith(ZIP_EXTENSIONS):
+        spooled = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_BYTES)
+        shutil.copyfileobj(stream, spooled)
+        spooled.seek(0)
+        stream = spooled
+    return FileStorage(stream=stream, filename=filename, content_type=mimetype)
+
+
+def iter_upload_images(files, limit=None, max_member_bytes=None):
+    """Yield `(filename, bytes)` for every image in a list of uploaded files.
+
+    Plain images are passed through; .zip and .tar(.gz/.bz2/.xz) uploads are
+    expanded member by member (tar is read as a stream) so images start
+    flowing before the whole archive has been unpacked. An archive member
+    larger than `max_member_bytes` uncompressed raises ArchiveMemberTooLarge,
+    and an image past the first `limit` raises TooManyImages.
+    """
+    count = 0
+    for storage in files:
+        name = (storage.filename or "").lower()
+        if name.endswith(ZIP_EXTENSIONS):
+            with zipfile.ZipFile(storage.stream) as zf:
+                for info in zf.infolist():
+                    if info.is_dir() or not _is_image(info.filename):
+                        continue
+                    if limit is not None and count >= limit:
+                        raise TooManyImages(limit)
+                    # zipfile stops decompressing at the declared file_size.
+                    _check_size(info.filename, info.file_size, max_member_bytes)
+                    count += 1
+                    yield info.filename, zf.read(info)
+        elif name.endswith(TAR_EXTENSIONS):
+            with tarfile.open(fileobj=storage.stream, mode="r|*") as tf:
+                for member in tf:
+                    if not member.isfile() or not _is_image(member.name):
+                        continue
+                    if limit is not None and count >= limit:
+                        raise TooManyImages(limit)
+                    _check_size(member.name, member.size, max_member_bytes)
+                    count += 1
+                    yield member.name, tf.extractfile(member).read()
+        else:
+            if limit is not None and count >= limit:
+                raise TooManyImages(limit)
+            count += 1
+            yield storage.filename, storage.read()
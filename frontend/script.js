@@ -132,6 +132,25 @@ fileUpload.addEventListener("change", async function(){
 // -------------------------
 // PDF generation
 // -------------------------
+async function waitForReport(statusUrl, { interval=1000, timeout=120000, notFoundGrace=10000 }={}){
+    const started = Date.now();
+    const deadline = started + timeout;
+    while(Date.now() < deadline){
+        const res = await fetch(statusUrl);
+        // A poll can reach a worker that does not know the job yet; keep trying briefly
+        if(res.status === 404 && Date.now() - started < notFoundGrace){
+            await new Promise(resolve => setTimeout(resolve, interval));
+            continue;
+        }
+        if(!res.ok) throw new Error(`Server returned ${res.status}`);
+        const data = await res.json();
+        if(data.status === "done") return data;
+        if(data.status === "failed") throw new Error(data.error || "Report generation failed");
+        await new Promise(resolve => setTimeout(resolve, interval));
+    }
+    throw new Error("Timed out waiting for the report");
+}
+
 document.addEventListener("click", async (e) => {
     if(e.target && e.target.id==="downloadReport"){
         e.preventDefault();
@@ -151,8 +170,16 @@ document.addEventListener("click", async (e) => {
 
         try {
             const res = await fetch(GENERATE_PDF_URL, { method:"POST", body:formData });
+            if(res.status === 429) throw new Error("Server is busy generating reports, please try again shortly");
             if(!res.ok) throw new Error(`Server returned ${res.status}`);
-            const data = await res.json();
+            if((res.headers.get("Content-Type") || "").includes("application/pdf")){
+                // Streamed report: open it straight from the response body
+                const blob = await res.blob();
+                window.open(URL.createObjectURL(blob), "_blank");
+                return;
+            }
+            let data = await res.json();
+            if(data.status_url) data = await waitForReport(data.status_url);
 
             if(data.pdf_url){
                 // Open PDF in new tab